@@ -0,0 +1,75 @@
+"""Cevap yolunu koruyan bellek içi yapılar.
+
+RoundAnswerSet: her kullanıcının bir turdaki yalnızca ilk cevabını kabul eder
+(O(1) küme kontrolü; yeni turda küme sıfırlanır). RateLimiter: anahtar
+(kullanıcı id, IP ...) başına token bucket; hatalı veya kötü niyetli
+istemcilerin cevap/bağlantı seliyle sunucuyu yormasını engeller.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class RoundAnswerSet:
+    """Geçerli turda cevap vermiş kullanıcı id'leri."""
+
+    def __init__(self):
+        self.round_id = None
+        self._users = set()
+        self._lock = threading.Lock()
+
+    def reset(self, round_id):
+        """Tur sınırında çağrılır; önceki turun kaydı bırakılır."""
+        with self._lock:
+            self.round_id = round_id
+            self._users = set()
+
+    def claim(self, round_id, user_id):
+        """Kullanıcının bu turdaki ilk cevabıysa True döner ve kaydeder."""
+        with self._lock:
+            if round_id != self.round_id:
+                # Tur sınırı bu worker'a henüz ulaşmadıysa burada sıfırla
+                self.round_id = round_id
+                self._users = set()
+            if user_id in self._users:
+                return False
+            self._users.add(user_id)
+            return True
+
+    def __len__(self):
+        return len(self._users)
+
+
+class RateLimiter:
+    """Anahtar başına token bucket: saniyede `rate` token dolar, en fazla `burst` birikir.
+
+    En fazla `max_keys` anahtar tutulur; en uzun süredir görülmeyen düşer
+    (düşen anahtar bir sonraki isteğinde dolu kovayla başlar). rate <= 0
+    sınırlamayı kapatır.
+    """
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # anahtar -> [token, son güncelleme]
+        self._lock = threading.Lock()
+
+    def allow(self, key, cost=1.0):
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True
+            return False
@@ -1,25 +1,53 @@
 import os
-import json  # JSON işlemek için
-import requests  # Facebook API istekleri için
-from flask import Flask, render_template, request, redirect, url_for, session, flash  # Flash ekledik
+import json  # Rapor çıktısı için
+from flask import Flask, render_template, request, redirect, url_for, session, flash, Response, abort  # Flash ekledik
 from flask_sqlalchemy import SQLAlchemy
-from flask_socketio import SocketIO, emit  # SocketIO ekledik
+from flask_socketio import SocketIO, emit, join_room  # SocketIO ekledik
 import logging
+import click  # CLI komut seçenekleri için (Flask ile gelir)
 import time  # Zamanlama için
 import threading  # Arka plan görevi için
 import random  # Rastgele soru seçimi için (opsiyonel)
+import atexit  # Kapanışta bekleyen cevapları yazmak için
+import tempfile  # Lider kilidi dosyasının varsayılan yeri için
+import hashlib  # Şema parmak izi için
+import fcntl  # Şema kontrolü kilidi için
+from contextlib import contextmanager
 from datetime import datetime, timedelta  # Zamanlama için
+from question_bank import QuestionBank  # Süreç içi soru önbelleği
+from write_behind import WriteBehindBuffer  # Cevapları toplu yazmak için
+from fanout import create_broker, create_election, start_heartbeat, wait_for_leadership  # Çoklu worker dağıtımı
+from round_payload import build_snapshot  # Tur paketini bir kez kodlamak için
+from identity import IdentityCache  # Kullanıcı kimliği önbelleği
+from question_scheduler import QuestionDeck, parse_weights  # Tekrarsız soru sırası
+from round_clock import PhaseScheduler  # Kaymasız, monotonic tur saati (tüm odalar için tek heap)
+from rooms import Room, RoomRegistry, normalize_room_name  # Mekan/masa başına bağımsız oyunlar
+from leaderboard import Leaderboard  # Kapatılan odaların skorları için
+from metrics import REGISTRY  # /metrics için sayaç ve histogramlar
+from sqlalchemy.engine import Engine, make_url  # Sorgu süresi olayları ve olay günlüğü kimliği için
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError, TimeoutError as PoolTimeoutError
+from answer_guard import RateLimiter  # Cevap/bağlantı hız sınırı
+from event_log import SegmentedEventLog, iter_events, summarize_answers  # Olay günlüğü ve analiz
+from db_config import configure_engine, engine_options  # Havuz ayarları ve SQLite WAL
+from round_stats import RoundStats, aggregate_history  # Tur sonu cevap dağılımı
+from page_cache import ShellCache, render_fragment  # Sayfa iskeleti önbelleği
+from static_assets import StaticAssets  # ETag'li, önceden sıkıştırılmış statik dosyalar
 
 # --- Uygulama ve Yapılandırma ---
-app = Flask(__name__)
-logging.basicConfig(level=logging.INFO)
-# async_mode=None, gevent veya eventlet kurulu değilse varsayılanı kullanır
-socketio = SocketIO(app, async_mode=None)  # SocketIO'yu başlat
+# Statik dosyaları Flask'ın varsayılan rotası yerine aşağıdaki `static` rotası sunar (bkz. static_assets.py)
+app = Flask(__name__, static_folder=None)
+# LOG_LEVEL=DEBUG istek başına ayrıntılı logları da açar (varsayılan INFO)
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+# async_mode=None, gevent veya eventlet kurulu değilse varsayılanı kullanır.
+# Binlerce eşzamanlı bağlantı için serve_async.py SOCKETIO_ASYNC_MODE'u 'gevent'/'eventlet' yapar.
+socketio = SocketIO(app, async_mode=os.environ.get('SOCKETIO_ASYNC_MODE') or None)  # SocketIO'yu başlat
 
 # Ortam Değişkenleri (Render'da ayarlanacak)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'yerel_cok_gizli_anahtar_degistir')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///local_quiz.db').replace("postgres://", "postgresql://", 1)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Havuz boyutları (DB_POOL_SIZE, DB_MAX_OVERFLOW, ...) ve SQLite ayarları için bkz. db_config.py
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 FACEBOOK_APP_ID = os.environ.get('FACEBOOK_APP_ID')
 FACEBOOK_APP_SECRET = os.environ.get('FACEBOOK_APP_SECRET')
 
@@ -30,26 +58,117 @@ FACEBOOK_APP_SECRET = os.environ.get('FACEBOOK_APP_SECRET')
 # Şimdilik Render URL'sini varsayalım (kendi adresinizle değiştirin!):
 FACEBOOK_REDIRECT_URI = 'https://cafe-quiz.onrender.com/facebook/callback'  # <<< KENDİ URL'NİZLE DEĞİŞTİRİN!
 FACEBOOK_API_VERSION = 'v18.0'  # API sürümünü belirtmek iyi practice'dir
+# Yerel sahte Graph sunucusuyla denemek için değiştirilebilir
+FACEBOOK_GRAPH_URL = os.environ.get('FACEBOOK_GRAPH_URL', 'https://graph.facebook.com')
+facebook_client = None  # İlk Facebook girişinde oluşturulur (bkz. get_facebook_client)
+facebook_client_lock = threading.Lock()
+
+def get_facebook_client():
+    """Havuzlanmış Graph API istemcisini ilk kullanımda kurar; worker açılışını yavaşlatmaz."""
+    global facebook_client
+    if facebook_client is None:
+        with facebook_client_lock:
+            if facebook_client is None:
+                from facebook_oauth import FacebookOAuthClient
+                facebook_client = FacebookOAuthClient(
+                    FACEBOOK_APP_ID, FACEBOOK_APP_SECRET, FACEBOOK_REDIRECT_URI,
+                    api_version=FACEBOOK_API_VERSION,
+                    graph_url=FACEBOOK_GRAPH_URL,
+                    connect_timeout=float(os.environ.get('FACEBOOK_CONNECT_TIMEOUT', 2)),
+                    read_timeout=float(os.environ.get('FACEBOOK_READ_TIMEOUT', 5)),
+                    retries=int(os.environ.get('FACEBOOK_HTTP_RETRIES', 2)),
+                    pool_size=int(os.environ.get('FACEBOOK_HTTP_POOL_SIZE', 20)),
+                )
+    return facebook_client
 
 db = SQLAlchemy(app)
+with app.app_context():
+    configure_engine(db.engine)  # SQLite: WAL + busy_timeout
 
 # --- Global Quiz State ---
-current_question_data = {
-    "question": None,
-    "end_time": None,
-    "question_id": None  # Cevapları doğrulamak için
-}
+# Tur durumu oda başına tutulur (bkz. rooms.py ve aşağıdaki `rooms` kaydı)
 quiz_timer_thread = None
+room_scheduler = None  # Lider süreçte tüm odaların faz saatini süren PhaseScheduler
+connected_users = {}  # Socket.IO sid -> (UserIdentity, oda adı) (bağlantı başına bir kez çözülür)
 stop_event = threading.Event()  # Arka plan görevini durdurmak için
-QUESTION_DURATION = 15  # Saniye cinsinden soru süresi
+QUESTION_DURATION = float(os.environ.get('QUESTION_DURATION', 15))  # Saniye cinsinden soru süresi
+# Ağ gecikmesi için süre bittikten sonra kabul edilen ek süre; cevap açıklaması bundan sonra yapılır
+ANSWER_GRACE_SECONDS = float(os.environ.get('ANSWER_GRACE_SECONDS', 0.5))
+REVEAL_DURATION = float(os.environ.get('REVEAL_DURATION', 3))  # Doğru cevabın gösterildiği faz
+LEADERBOARD_DURATION = float(os.environ.get('LEADERBOARD_DURATION', 4))  # Skor tablosu fazı
+INTERMISSION_DURATION = float(os.environ.get('INTERMISSION_DURATION', 1))  # Turlar arası ara
+ROUND_PAYLOAD_ENCODING = os.environ.get('ROUND_PAYLOAD_ENCODING', 'json')  # 'json' veya ikili 'compact'
+IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 10000))  # Önbellekteki en fazla kullanıcı
+IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 300))  # Kimlik önbelleği süresi (saniye)
+# Soru sırası: 'shuffle' (her destede karıştır) veya 'sequential' (id sırası)
+QUESTION_ORDER = os.environ.get('QUESTION_ORDER', 'shuffle')
+# Ağırlıklar, ör. 'science:2,history:0.5' ve 'easy:1,hard:0.5'
+QUESTION_CATEGORY_WEIGHTS = parse_weights(os.environ.get('QUESTION_CATEGORY_WEIGHTS'))
+QUESTION_DIFFICULTY_WEIGHTS = parse_weights(os.environ.get('QUESTION_DIFFICULTY_WEIGHTS'))
+QUESTION_CACHE_TTL = int(os.environ.get('QUESTION_CACHE_TTL', 60))  # Soru önbelleği yenileme süresi (saniye)
+CORRECT_ANSWER_POINTS = 10  # Doğru cevap başına puan
+LEADERBOARD_SIZE = 10  # Her turda yayınlanan skor tablosu uzunluğu
+ANSWER_FLUSH_INTERVAL = float(os.environ.get('ANSWER_FLUSH_INTERVAL', 1.0))  # Cevap tamponu yazma aralığı (saniye)
+# Odalar: her mekan/masa kendi oyununu oynar. QUIZ_ROOMS başlangıçta açılan odalar (virgülle ayrılmış)
+QUIZ_DEFAULT_ROOM = normalize_room_name(os.environ.get('QUIZ_DEFAULT_ROOM')) or 'main'
+QUIZ_ROOMS = [name for name in map(normalize_room_name, os.environ.get('QUIZ_ROOMS', QUIZ_DEFAULT_ROOM).split(',')) if name]
+QUIZ_DYNAMIC_ROOMS = os.environ.get('QUIZ_DYNAMIC_ROOMS', '0') == '1'  # ?room=... ile yeni oda açılabilsin mi
+QUIZ_MAX_ROOMS = int(os.environ.get('QUIZ_MAX_ROOMS', 500))
+# Bu kadar tur boyunca bağlı istemcisi ve cevabı olmayan dinamik oda kapatılır (saati durur; 0 = kapatma)
+QUIZ_ROOM_IDLE_ROUNDS = int(os.environ.get('QUIZ_ROOM_IDLE_ROUNDS', 3))
+# Token bucket hız sınırları: saniyede dolan token ve biriken en fazla token (0 = sınırsız)
+ANSWER_RATE_LIMIT = float(os.environ.get('ANSWER_RATE_LIMIT', 2))  # Kullanıcı başına cevap
+ANSWER_RATE_BURST = float(os.environ.get('ANSWER_RATE_BURST', 5))
+CONNECT_RATE_LIMIT = float(os.environ.get('CONNECT_RATE_LIMIT', 0.5))  # Kullanıcı (yoksa IP) başına bağlantı
+CONNECT_RATE_BURST = float(os.environ.get('CONNECT_RATE_BURST', 5))
+# Olay günlüğü (tur/cevap/sonuç); boş bırakılırsa kapalı. Aynı makinedeki worker'lar aynı dizini paylaşır
+EVENT_LOG_DIR = os.environ.get('EVENT_LOG_DIR', os.path.join(app.instance_path, 'events'))
+EVENT_LOG_SEGMENT_MB = int(os.environ.get('EVENT_LOG_SEGMENT_MB', 64))
+EVENT_LOG_REPLAY_SECONDS = int(os.environ.get('EVENT_LOG_REPLAY_SECONDS', 900))  # Başlangıçta geri oynatılan süre
+# Günlük cevap tamponundan sık yazılır: tek süreç çökse de tamponda kalan cevapların çoğu günlükte olur
+EVENT_LOG_FLUSH_INTERVAL = float(os.environ.get('EVENT_LOG_FLUSH_INTERVAL', 0.2))
+# Şablon iskeleti önbelleği (debug/auto-reload modunda kendiliğinden kapalıdır)
+RENDER_CACHE = os.environ.get('RENDER_CACHE', '1') == '1'
+# Sürümsüz (?v= olmadan) istenen statik dosyaların önbellek süresi; sürümlü URL'ler 1 yıl, immutable
+STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 3600))
+# Şema kontrolü: 'auto' model tanımları değişince (dağıtım başına bir kez), 'always' her açılışta, 'never' hiç
+SCHEMA_CHECK = os.environ.get('SCHEMA_CHECK', 'auto')
+JITTER_LOG_INTERVAL = 60  # Zamanlayıcı jitter özetinin loglanma aralığı (saniye)
+# Yük testi (benchmark.py) için Facebook'suz giriş ve sayaç rotaları; production'da AÇMAYIN
+QUIZ_TEST_LOGIN = os.environ.get('QUIZ_TEST_LOGIN') == '1'
+# Çoklu worker: boşsa tek süreç; 'unix:///tmp/cafe_quiz.sock' veya 'redis://...' ile worker'lar olay paylaşır
+QUIZ_BROKER_URL = os.environ.get('QUIZ_BROKER_URL')
+QUIZ_LEADER_LOCK = os.environ.get('QUIZ_LEADER_LOCK', os.path.join(tempfile.gettempdir(), 'cafe_quiz_leader.lock'))
+# Redis lider kirasının süresi (saniye); lider bunu ayrı bir heartbeat ile ttl/3'te bir yeniler
+QUIZ_LEADER_TTL = float(os.environ.get('QUIZ_LEADER_TTL', 10))
+broker = create_broker(QUIZ_BROKER_URL)  # Tur ve skor olaylarını tüm worker'lara iletir
+election = create_election(QUIZ_BROKER_URL, QUIZ_LEADER_LOCK, ttl=QUIZ_LEADER_TTL)  # Quiz saatini tek bir süreç çalıştırır
+
+# --- Metrikler (/metrics) ---
+CONNECTED_SOCKETS = REGISTRY.gauge('quiz_connected_sockets', "Authenticated Socket.IO connections on this worker.",
+                                   function=lambda: len(connected_users))
+ROUNDS = REGISTRY.counter('quiz_rounds_total', "Rounds started on this worker.", ['room'])
+EMITS = REGISTRY.counter('quiz_emits_total', "Socket.IO emits by event (room broadcasts count once).", ['event'])
+TIMER_TICK_SECONDS = REGISTRY.histogram('quiz_timer_tick_seconds', "Time spent handling one quiz timer phase.", ['phase'])
+TIMER_JITTER_SECONDS = REGISTRY.histogram('quiz_timer_jitter_seconds', "Delay between a phase's planned and actual start.")
+ANSWER_SECONDS = REGISTRY.histogram('quiz_answer_seconds', "submit_answer handling time.", ['transport'])
+ANSWERS = REGISTRY.counter('quiz_answers_total', "Submitted answers by result.", ['status'])
+DB_QUERIES = REGISTRY.counter('quiz_db_queries_total', "SQL statements executed.")
+DB_QUERY_SECONDS = REGISTRY.histogram('quiz_db_query_seconds', "SQL statement execution time.")
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram('quiz_db_queries_per_request', "SQL statements per HTTP request.",
+                                            ['endpoint'], buckets=(0, 1, 2, 3, 5, 10, 20, 50))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram('quiz_http_request_seconds', "HTTP request handling time.", ['endpoint'])
+FACEBOOK_LOGIN_SECONDS = REGISTRY.histogram('quiz_facebook_login_seconds', "Facebook token exchange + profile fetch time.",
+                                            ['outcome'])
+RATE_LIMITED = REGISTRY.counter('quiz_rate_limited_total', "Events rejected by the rate limiter.", ['event'])
+request_stats = threading.local()  # İstek başına sorgu sayısı (gevent altında greenlet başına)
 
 # --- Veritabanı Modelleri ---
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     facebook_id = db.Column(db.String(100), unique=True, nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
-    # İleride skorları buraya bağlayabiliriz
-    # scores = db.relationship('Score', backref='user', lazy=True)
+    answers = db.relationship('Answer', backref='user', lazy=True)
 
     def __repr__(self):
         return f'<User {self.name} (FB ID: {self.facebook_id})>'
@@ -63,6 +182,10 @@ class Question(db.Model):
     option3 = db.Column(db.String(100), nullable=False)
     option4 = db.Column(db.String(100), nullable=False)
     correct_answer = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50), nullable=True)  # Ağırlıklı soru seçimi için (opsiyonel)
+    difficulty = db.Column(db.String(20), nullable=True)  # Ör. easy / medium / hard (opsiyonel)
+    # İçe aktarılan soruların kararlı anahtarı; tekrar içe aktarmada upsert bu kolona göre yapılır
+    external_id = db.Column(db.String(100), nullable=True, unique=True, index=True)
 
     def get_options(self):
         return [self.option1, self.option2, self.option3, self.option4]
@@ -76,14 +199,394 @@ class Question(db.Model):
             # Doğru cevabı istemciye göndermiyoruz!
         }
 
+class Answer(db.Model):
+    """Bir kullanıcının bir turdaki cevabı ve aldığı puan."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    # db-seed soruları silip yeniden eklediği için question'a FK koymuyoruz
+    question_id = db.Column(db.Integer, nullable=False, index=True)
+    round_id = db.Column(db.String(64), nullable=False)
+    room = db.Column(db.String(64), nullable=True, index=True)  # Boşsa varsayılan oda
+    answer = db.Column(db.String(100), nullable=False)
+    is_correct = db.Column(db.Boolean, nullable=False, default=False)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    answered_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    # Kullanıcı başına tur başına tek cevap; toplu yazmada upsert anahtarı
+    __table_args__ = (db.UniqueConstraint('user_id', 'round_id', name='uq_answer_user_round'),)
+
+    def __repr__(self):
+        return f'<Answer user={self.user_id} round={self.round_id} correct={self.is_correct}>'
+
+class SchemaVersion(db.Model):
+    """Kontrol edilip uygulanmış şema parmak izleri (bkz. ensure_schema_once)."""
+    __tablename__ = 'schema_version'
+    fingerprint = db.Column(db.String(64), primary_key=True)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+# Soru bankası: Question tablosu bir kez yüklenir, TTL dolunca veya soru değişince yenilenir.
+def _load_questions():
+    # Soru bankası TTL yenilemesini arka plan thread'inde de yapar; app context burada kurulur
+    with app.app_context():
+        return Question.query.order_by(Question.id).all()
+
+question_bank = QuestionBank(_load_questions, ttl=QUESTION_CACHE_TTL)
+
+# Oda adı -> Leaderboard: açık olmayan (yalnızca geçmişte kalan veya boşta kapatılan) odaların skorları
+archived_leaderboards = {}
+
+def _create_room(name):
+    """Her oda aynı soru bankası üzerinde kendi destesini karıştırır; skorlar varsa arşivden gelir."""
+    room = Room(name, QuestionDeck(question_bank, order=QUESTION_ORDER,
+                                   category_weights=QUESTION_CATEGORY_WEIGHTS,
+                                   difficulty_weights=QUESTION_DIFFICULTY_WEIGHTS))
+    leaderboard = archived_leaderboards.pop(name, None)
+    if leaderboard is not None:
+        room.leaderboard = leaderboard
+    return room
+
+rooms = RoomRegistry(_create_room, max_rooms=QUIZ_MAX_ROOMS, pinned=QUIZ_ROOMS + [QUIZ_DEFAULT_ROOM])
+for _room_name in QUIZ_ROOMS + [QUIZ_DEFAULT_ROOM]:
+    rooms.get_or_create(_room_name)
+
+@db.event.listens_for(Question, 'after_insert')
+@db.event.listens_for(Question, 'after_update')
+@db.event.listens_for(Question, 'after_delete')
+def _invalidate_question_bank(mapper, connection, target):
+    question_bank.invalidate()
+
+# --- Sık Çalışan Sorgular ---
+# İfadeler bir kez kurulur; SQLAlchemy derlenmiş SQL'i önbellekte tuttuğu için her
+# çalıştırmada yalnızca parametreler bağlanır (ORM nesnesi/identity map maliyeti yok).
+USER_IDENTITY_BY_ID = db.select(User.id, User.name, User.facebook_id).where(User.id == db.bindparam('user_id'))
+_answer_insert_stmt = None
+
+def answer_insert_statement():
+    """Cevap INSERT ifadesini veritabanı türüne göre bir kez kurar; tekrar gelen cevaplar yok sayılır."""
+    global _answer_insert_stmt
+    if _answer_insert_stmt is None:
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+
+        if dialect_insert is not None:
+            _answer_insert_stmt = dialect_insert(Answer).on_conflict_do_nothing(index_elements=['user_id', 'round_id'])
+        else:
+            _answer_insert_stmt = db.insert(Answer)
+    return _answer_insert_stmt
+
+def load_user_identity(user_id):
+    """Kimlik önbelleği için yalnızca gereken kolonları getirir; kullanıcı yoksa None."""
+    return db.session.execute(USER_IDENTITY_BY_ID, {'user_id': user_id}).first()
+
+# --- Cevap Yazma (write-behind) ---
+def persist_answers(rows):
+    """Tampondaki cevapları tek bir toplu INSERT ile yazar; tekrar gelenler yok sayılır."""
+    with app.app_context():
+        db.session.execute(answer_insert_statement(), rows)
+        db.session.commit()
+
+def upsert_questions(rows):
+    """Soru satırlarını external_id'ye göre tek bir toplu INSERT ... ON CONFLICT ile yazar."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise click.ClickException(f"Question import is not supported on {dialect}")
+
+    stmt = dialect_insert(Question)
+    updated_columns = {name: stmt.excluded[name] for name in rows[0] if name != 'external_id'}
+    db.session.execute(stmt.on_conflict_do_update(index_elements=['external_id'], set_=updated_columns), rows)
+    db.session.commit()
+
+def is_transient_db_error(exc):
+    """Bağlantı kopması, kilit/zaman aşımı gibi tekrar denendiğinde geçebilecek hatalar.
+
+    IntegrityError, DataError, ProgrammingError gibi satırdan kaynaklanan hatalar
+    tekrar denenmez; tampon bu durumda bozuk satırı ayıklayıp atar.
+    """
+    if isinstance(exc, (OperationalError, DisconnectionError, PoolTimeoutError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+answer_buffer = WriteBehindBuffer(persist_answers, interval=ANSWER_FLUSH_INTERVAL, name='answer-writer',
+                                  retryable=is_transient_db_error)
+
+# --- Olay Günlüğü ---
+# Yalnızca lider süreç yazar: tüm worker'ların olayları broker üzerinden ona da ulaşır
+# Segmentler veritabanı kimliğiyle damgalanır; başka bir veritabanının olayları geri oynatılmaz
+EVENT_LOG_SOURCE = hashlib.sha256(
+    make_url(app.config['SQLALCHEMY_DATABASE_URI']).render_as_string(hide_password=True).encode('utf-8')).hexdigest()[:16]
+event_log = SegmentedEventLog(EVENT_LOG_DIR, segment_bytes=EVENT_LOG_SEGMENT_MB * 1024 * 1024,
+                              source=EVENT_LOG_SOURCE) if EVENT_LOG_DIR else None
+event_buffer = WriteBehindBuffer(event_log.write, interval=EVENT_LOG_FLUSH_INTERVAL, name='event-log') if event_log else None
+restored_rounds = {}  # Oda adı -> geri yüklenen açık turun başlangıcı (time.monotonic); lider saati buradan sürdürür
+
+def log_event(message, **extra):
+    """Broker olayını zaman damgasıyla günlüğe ekler (lider süreçte, sıcak yolda yalnızca bir append)."""
+    if event_buffer is not None and room_scheduler is not None:
+        event = dict(message, ts=time.time())
+        event.update(extra)
+        event_buffer.add(event)
+
+def replay_event_log():
+    """Son EVENT_LOG_REPLAY_SECONDS içindeki olayları geri oynatır (başlangıçta, load_leaderboard'dan önce).
+
+    Çökme anında tamponda kalıp veritabanına yazılamamış cevaplar yeniden
+    yazılır (tekrar gelenler yok sayılır) ve süresi dolmamış açık turlar
+    odalara geri yüklenir. Yalnızca bu veritabanıyla damgalanmış segmentler
+    okunur. Günlük de tamponlu yazıldığından çökmeden önceki son
+    EVENT_LOG_FLUSH_INTERVAL içindeki cevaplar kurtarılamaz.
+    """
+    if not event_log or not os.path.isdir(EVENT_LOG_DIR):
+        return
+    can_reinsert = db.engine.dialect.name in ('postgresql', 'sqlite')  # ON CONFLICT DO NOTHING gerekir
+    last_rounds = {}  # oda -> son new_question olayı
+    round_answers = {}  # oda -> (round_id, [score olayları]) yalnızca son tur için
+    batch, replayed = [], 0
+    for event in iter_events(EVENT_LOG_DIR, since=time.time() - EVENT_LOG_REPLAY_SECONDS, source=EVENT_LOG_SOURCE):
+        kind, room_name = event.get('type'), event.get('room')
+        if kind == 'new_question':
+            last_rounds[room_name] = event
+            round_answers[room_name] = (event['round_id'], [])
+        elif kind == 'score':
+            current = round_answers.get(room_name)
+            if current and current[0] == event.get('round_id'):
+                current[1].append(event)
+            if can_reinsert and event.get('question_id') is not None:
+                batch.append({'user_id': event['user_id'], 'question_id': event['question_id'],
+                              'round_id': event['round_id'], 'room': room_name, 'answer': event.get('answer', ''),
+                              'is_correct': bool(event.get('correct')), 'points': event['points'],
+                              'answered_at': datetime.fromtimestamp(event['ts'])})
+                if len(batch) >= 1000:
+                    persist_answers(batch)
+                    replayed += len(batch)
+                    batch = []
+    if batch:
+        persist_answers(batch)
+        replayed += len(batch)
+
+    restored = 0
+    for room_name, event in last_rounds.items():
+        remaining = (datetime.fromisoformat(event['end_time']) - datetime.now()).total_seconds()
+        room = rooms.get(room_name)  # Yalnızca geçmişte kalan odalar yeniden açılmaz
+        question_record = question_bank.get(event['question_id'])
+        if remaining <= 0 or room is None or question_record is None:
+            continue
+        # Tur hâlâ açık: durumu geri yükle, bu turda cevap vermiş olanları tekrar kabul etme
+        room.state["question"] = question_record
+        room.state["question_id"] = question_record.id
+        room.state["round_id"] = room.round_id = event['round_id']
+        room.state["end_time"] = datetime.fromisoformat(event['end_time'])
+        room.state["snapshot"] = build_snapshot(question_record.payload, event['round_id'], event['end_time'],
+                                                remaining, ROUND_PAYLOAD_ENCODING)
+        room.deck.last_id = question_record.id
+        room.stats = RoundStats(event['round_id'], question_record.id, question_record.payload['options'])
+        for answer in round_answers[room_name][1]:
+            room.answered.claim(event['round_id'], answer['user_id'])
+            if room.scored.claim(event['round_id'], answer['user_id']):
+                room.stats.add(answer.get('answer'), answer.get('correct'), answer.get('elapsed_ms'),
+                               answer['user_id'], answer.get('name'))
+        restored_rounds[room_name] = time.monotonic() + remaining - QUESTION_DURATION
+        restored += 1
+    logging.info(f"Event log replayed: {replayed} answers re-persisted, {restored} open rounds restored.")
+
+def load_leaderboard():
+    """Oda skor tablolarını veritabanındaki toplam puanlardan yeniden kurar (başlangıçta bir kez).
+
+    Açık olmayan odaların skorları arşivlenir; oda yeniden açılınca kullanılır
+    (bu odalar için saat başlatılmaz).
+    """
+    room_column = db.func.coalesce(Answer.room, QUIZ_DEFAULT_ROOM)
+    rows = (db.session.query(room_column, User.id, User.name, db.func.sum(Answer.points))
+            .join(Answer, Answer.user_id == User.id)
+            .group_by(room_column, User.id, User.name)
+            .all())
+    rows_by_room = {}
+    for room_name, user_id, user_name, total in rows:
+        rows_by_room.setdefault(room_name, []).append((user_id, user_name, total))
+    for room_name, room_rows in rows_by_room.items():
+        room = rooms.get(room_name)
+        if room is not None:
+            room.leaderboard.load(room_rows)
+        else:
+            archived_leaderboards[room_name] = leaderboard = Leaderboard()
+            leaderboard.load(room_rows)
+    logging.info(f"Leaderboards loaded for {len(rows_by_room)} rooms ({len(rows)} player scores).")
+
+def record_answer(room, user_id, user_name, question_id, round_id, user_answer, is_correct):
+    """Cevabı puanlar, oda skor tablosunu günceller ve yazılmak üzere tampona ekler."""
+    points = CORRECT_ANSWER_POINTS if is_correct else 0
+    # Sorunun yayınlanmasından bu yana geçen süre (olay günlüğü analizleri için)
+    snapshot = room.state.get("snapshot")
+    elapsed_ms = max(0, int((time.monotonic() - snapshot.deadline + QUESTION_DURATION) * 1000)) if snapshot else None
+    # Skor tablosu her worker'da aynı kalsın diye güncelleme broker üzerinden yayınlanır
+    broker.publish({'type': 'score', 'room': room.name, 'round_id': round_id, 'user_id': user_id,
+                    'name': user_name, 'points': points, 'question_id': question_id, 'answer': user_answer,
+                    'correct': is_correct, 'elapsed_ms': elapsed_ms})
+    answer_buffer.add({
+        'user_id': user_id,
+        'question_id': question_id,
+        'round_id': round_id,
+        'room': room.name,
+        'answer': user_answer,
+        'is_correct': is_correct,
+        'points': points,
+        'answered_at': datetime.now(),
+    })
+    return points
+
+def process_answer(room, user_id, user_name, submitted_question_id, user_answer):
+    """Cevabı odanın aktif sorusuna göre kontrol edip kaydeder (HTTP ve SocketIO ortak yolu).
+
+    (durum, QuestionRecord) döndürür; durum 'rate_limited', 'stale', 'late',
+    'invalid', 'duplicate', 'unverifiable', 'correct' veya 'incorrect' olabilir.
+    Veritabanına gitmez.
+    """
+    if not answer_limiter.allow(user_id):
+        RATE_LIMITED.inc(event='answer')
+        return 'rate_limited', None
+
+    # Odanın tur durumundaki soru ile karşılaştır
+    state = room.state if room else {}
+    active_question_id = state.get("question_id")
+    round_id = state.get("round_id")
+    snapshot = state.get("snapshot")
+
+    # Doğru soruya mı?
+    if not active_question_id or str(submitted_question_id) != str(active_question_id):
+        return 'stale', None
+
+    # Zamanında mı cevapladı? (monotonic bitiş + ağ gecikmesi payı)
+    if snapshot and time.monotonic() > snapshot.deadline + ANSWER_GRACE_SECONDS:
+        return 'late', None
+
+    # Doğru cevabı soru bankasından al (veritabanına gitmeden)
+    question_record = question_bank.get(active_question_id)
+    if not question_record:
+        return 'unverifiable', None
+
+    # Yalnızca sorunun seçeneklerinden biri kabul edilir; başka tür/uzunluktaki değerler
+    # broker'a, tampona ve String(100) kolonuna hiç ulaşmaz (kullanıcının cevap hakkı da gitmez)
+    if not isinstance(user_answer, str) or user_answer not in question_record.payload['options']:
+        return 'invalid', None
+
+    # Kullanıcı başına turda yalnızca ilk cevap sayılır (O(1), tur başında sıfırlanır)
+    if not room.answered.claim(round_id, user_id):
+        return 'duplicate', None
+
+    is_correct = (user_answer == question_record.correct_answer)
+    logging.debug(f"User {user_name} submitted '{user_answer}' for Q_ID {active_question_id}. Correct: {is_correct}")
+
+    # Skor kaydı tampona gider, arka plandaki yazıcı toplu halde veritabanına yazar
+    record_answer(room, user_id, user_name, question_record.id, round_id, user_answer, is_correct)
+    return ('correct' if is_correct else 'incorrect'), question_record
+
+# --- Ölçüm Kancaları ---
+@db.event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context.quiz_query_started = time.perf_counter()
+
+@db.event.listens_for(Engine, 'after_cursor_execute')
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERY_SECONDS.observe(time.perf_counter() - context.quiz_query_started)
+    DB_QUERIES.inc()
+    if getattr(request_stats, 'queries', None) is not None:
+        request_stats.queries += 1
+
+@app.before_request
+def _start_request_metrics():
+    request_stats.queries = 0
+    request_stats.started = time.perf_counter()
+
+@app.teardown_request
+def _record_request_metrics(exc):
+    started = getattr(request_stats, 'started', None)
+    if started is None:
+        return
+    endpoint = request.endpoint or 'unknown'
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    DB_QUERIES_PER_REQUEST.observe(request_stats.queries, endpoint=endpoint)
+    request_stats.started = request_stats.queries = None
+
+def broadcast(event, data, room_name):
+    """Olayı odaya yayınlar ve emit sayacını artırır."""
+    socketio.emit(event, data, to=room_name)
+    EMITS.inc(event=event)
+
+answer_limiter = RateLimiter(ANSWER_RATE_LIMIT, ANSWER_RATE_BURST)
+connect_limiter = RateLimiter(CONNECT_RATE_LIMIT, CONNECT_RATE_BURST)
+
 # --- Yardımcı Fonksiyon ---
+identity_cache = IdentityCache(max_size=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+
 def get_current_user():
-    """Session'daki user_id'ye göre User nesnesini döndürür."""
+    """Session'daki user_id'ye göre kullanıcı kimliğini (UserIdentity) döndürür.
+
+    Kimlik önbellekteyse veritabanına gidilmez.
+    """
     user_id = session.get('user_id')
     if user_id:
-        return User.query.get(user_id)
+        return identity_cache.get_or_load(user_id, load_user_identity)
     return None
 
+# --- Şablonlar ve Statik Dosyalar ---
+shell_cache = ShellCache(render_template, app.jinja_env, app.update_template_context)
+static_assets = StaticAssets(os.path.join(app.root_path, 'static'))
+app.add_template_global(render_fragment, 'fragment')
+
+@app.template_global()
+def asset_url(filename):
+    """İçerik hash'li statik dosya URL'si; dosya değişince URL de değişir, tarayıcı önbelleği güvenle uzun tutulur."""
+    asset = static_assets.get(filename)
+    return url_for('static', filename=filename, v=asset.version if asset else None)
+
+@app.template_global()
+def asset_integrity(filename):
+    """<script integrity> değeri; dosyanın gerçek içeriğinden hesaplanır."""
+    asset = static_assets.get(filename)
+    return asset.integrity if asset else ''
+
+def render_page(template_name, shell_context=None, **context):
+    """Şablonu iskelet önbelleğiyle render eder.
+
+    `shell_context` iskeleti değiştiren (kullanıcıdan bağımsız) değişkenlerdir
+    ve önbellek anahtarına girer; `context` yalnızca {{ fragment(...) }}
+    parçalarında (flash mesajları, kullanıcı bilgisi ...) kullanılır.
+    """
+    shell_context = shell_context or {}
+    if not RENDER_CACHE or app.jinja_env.auto_reload:
+        return render_template(template_name, **shell_context, **context)
+    key = (request.script_root,) + tuple(sorted(shell_context.items()))
+    return shell_cache.render(template_name, key, shell_context, dict(context, **shell_context))
+
+@app.route('/static/<path:filename>', endpoint='static')
+def static_file(filename):
+    """Statik dosyayı bellekten sunar: önceden sıkıştırılmış gövde, ETag ve Cache-Control ile."""
+    asset = static_assets.get(filename)
+    if asset is None:
+        abort(404)
+    body, encoding = asset.select(lambda name: request.accept_encodings[name] > 0)
+    response = Response(body, mimetype=asset.mimetype)
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    # Kodlamaya göre farklı bytes döndüğü için ETag de farklı olmalı
+    response.set_etag(f"{asset.etag}-{encoding}" if encoding else asset.etag)
+    response.cache_control.public = True
+    if request.args.get('v') == asset.version:
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = STATIC_MAX_AGE
+    return response.make_conditional(request)
+
 # --- Rotalar (Routes) ---
 
 @app.route('/')
@@ -91,7 +594,12 @@ def index():
     user = get_current_user()
     if not user:
         # Kullanıcı giriş yapmamışsa, giriş sayfasına yönlendir (veya giriş butonu göster)
-        return render_template('login.html')
+        return render_page('login.html')
+
+    # Oda: ?room=... > oturumdaki oda > varsayılan oda
+    # Socket bağlantısıyla aynı kural: var olan oda, dinamik odalar açıksa yeni oda, yoksa varsayılan oda
+    room_name = resolve_room(request.args.get('room') or session.get('room')).name
+    session['room'] = room_name
 
     # Kullanıcı giriş yapmışsa quiz'i göster
     try:
@@ -101,7 +609,7 @@ def index():
             session['current_question_index'] = 0
             session['score'] = 0
             session['quiz_over'] = False
-            session['total_questions'] = Question.query.count()
+            session['total_questions'] = len(question_bank)  # Sorgu yok, soru bankasından
 
         q_index = session['current_question_index']
         total_questions = session.get('total_questions', 0)
@@ -109,29 +617,34 @@ def index():
 
         if total_questions == 0:
             flash("Quiz is not ready yet. No questions found!", "warning")
-            return render_template('quiz.html', quiz_over=True, current_user=user)
+            return render_page('quiz.html', {'room': room_name}, quiz_over=True, current_user=user)
         elif q_index >= total_questions:
             session['quiz_over'] = True
-            return render_template('quiz.html', quiz_over=True, final_score=session['score'], total_questions=total_questions, current_user=user)
+            return render_page('quiz.html', {'room': room_name}, quiz_over=True, final_score=session['score'],
+                               total_questions=total_questions, current_user=user)
 
-        current_q = Question.query.order_by(Question.id).offset(q_index).first()
+        # OFFSET taraması yerine önceden sıralanmış id listesinde O(1) erişim
+        question_ids = question_bank.ordered_ids()
+        current_q = question_bank.get(question_ids[q_index]) if q_index < len(question_ids) else None
         if not current_q:
             flash("An error occurred while fetching the question.", "danger")
             session['quiz_over'] = True
-            return render_template('quiz.html', quiz_over=True, current_user=user)
+            return render_page('quiz.html', {'room': room_name}, quiz_over=True, current_user=user)
 
-        # --- Diagnostic Logging ---
-        logging.info(f"Rendering quiz for user {user.name}. Q Index: {q_index}, Total Qs: {total_questions}, Score: {session['score']}")
-        logging.info(f"Fetched Question Object: {current_q}")
+        # --- Diagnostic Logging (yalnızca LOG_LEVEL=DEBUG iken; her sayfa görüntülemesinde çalışır) ---
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug(f"Rendering quiz for user {user.name}. Q Index: {q_index}, Total Qs: {total_questions}, Score: {session['score']}")
+            logging.debug(f"Fetched Question Object: {current_q}")
         # --- End Diagnostic Logging ---
 
-        return render_template('quiz.html',
-                               question=current_q,
-                               score=session['score'],
-                               q_number=q_index + 1,
-                               total_questions=total_questions,
-                               quiz_over=False,
-                               current_user=user)
+        # Sayfa iskeleti oda başına bir kez render edilir; kullanıcıya özel kısımlar parça olarak eklenir
+        return render_page('quiz.html', {'room': room_name},
+                           question=current_q,
+                           score=session['score'],
+                           q_number=q_index + 1,
+                           total_questions=total_questions,
+                           quiz_over=False,
+                           current_user=user, error_message=error_message)
     except Exception as e:
         logging.exception("An error occurred in index route for logged in user:")
         flash("An unexpected error occurred. Please try logging in again.", "danger")
@@ -144,7 +657,7 @@ def login_page():
     # Zaten giriş yapmışsa ana sayfaya yönlendir
     if get_current_user():
         return redirect(url_for('index'))
-    return render_template('login.html')
+    return render_page('login.html')
 
 # Facebook Login Başlatma
 @app.route('/login/facebook')
@@ -192,67 +705,23 @@ def facebook_callback():
 
     logging.info("Received authorization code from Facebook. Exchanging for access token.")
 
-    # --- Kod ile Access Token Al ---
-    token_url = f"https://graph.facebook.com/{FACEBOOK_API_VERSION}/oauth/access_token"
-    token_params = {
-        'client_id': FACEBOOK_APP_ID,
-        'redirect_uri': FACEBOOK_REDIRECT_URI,
-        'client_secret': FACEBOOK_APP_SECRET,
-        'code': code
-    }
+    # --- Kod ile Access Token Al, ardından Kullanıcı Bilgilerini Al ---
+    # Havuzlanmış bağlantılar, zaman aşımı ve yeniden deneme için bkz. facebook_oauth.py
+    from facebook_oauth import FacebookOAuthError
+    login_started = time.perf_counter()
     try:
-        token_response = requests.get(token_url, params=token_params)
-        token_response.raise_for_status()  # HTTP hatası varsa exception fırlat
-        token_data = token_response.json()
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error requesting access token: {e}")
-        logging.error(f"Response content: {token_response.content}")
-        flash("Could not connect to Facebook to get access token.", "danger")
-        return redirect(url_for('login_page'))
-    except json.JSONDecodeError:
-        logging.error(f"Failed to decode JSON from access token response: {token_response.text}")
-        flash("Received invalid response from Facebook for access token.", "danger")
+        user_data = get_facebook_client().login(code)
+    except FacebookOAuthError as e:
+        FACEBOOK_LOGIN_SECONDS.observe(time.perf_counter() - login_started, outcome='error')
+        logging.error(f"Facebook login failed: {e}")
+        flash(e.user_message, "danger")
         return redirect(url_for('login_page'))
+    FACEBOOK_LOGIN_SECONDS.observe(time.perf_counter() - login_started, outcome='ok')
 
-    access_token = token_data.get('access_token')
-    if not access_token:
-        error_details = token_data.get('error', {})
-        logging.error(f"Facebook did not return access token. Error: {error_details}")
-        flash(f"Failed to get access token from Facebook: {error_details.get('message', 'Unknown error')}", "danger")
-        return redirect(url_for('login_page'))
-
-    logging.info("Successfully obtained access token. Fetching user profile.")
-
-    # --- Access Token ile Kullanıcı Bilgilerini Al ---
-    user_info_url = f"https://graph.facebook.com/{FACEBOOK_API_VERSION}/me"
-    user_info_params = {
-        'fields': 'id,name,picture',  # İstediğimiz alanlar (picture varsayılan küçük boy döner)
-        'access_token': access_token
-    }
-    # Daha büyük profil resmi için: 'fields': 'id,name,picture.type(large)'
-    try:
-        user_info_response = requests.get(user_info_url, params=user_info_params)
-        user_info_response.raise_for_status()
-        user_data = user_info_response.json()
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error requesting user info: {e}")
-        logging.error(f"Response content: {user_info_response.content}")
-        flash("Could not connect to Facebook to get user profile.", "danger")
-        return redirect(url_for('login_page'))
-    except json.JSONDecodeError:
-        logging.error(f"Failed to decode JSON from user info response: {user_info_response.text}")
-        flash("Received invalid response from Facebook for user profile.", "danger")
-        return redirect(url_for('login_page'))
-
-    facebook_id = user_data.get('id')
-    user_name = user_data.get('name')
+    facebook_id = user_data['id']
+    user_name = user_data['name']
     # profile_pic_data = user_data.get('picture', {}).get('data', {}).get('url')  # Picture URL'si
 
-    if not facebook_id or not user_name:
-        logging.error(f"Facebook response missing ID or Name: {user_data}")
-        flash("Could not retrieve necessary user information from Facebook.", "danger")
-        return redirect(url_for('login_page'))
-
     logging.info(f"Fetched user info: ID={facebook_id}, Name={user_name}")
 
     # --- Kullanıcıyı Veritabanında Bul veya Oluştur ---
@@ -264,6 +733,8 @@ def facebook_callback():
             if user.name != user_name:
                 user.name = user_name
                 db.session.commit()
+                # Eski ismi tutan önbellekleri (diğer worker'lar dahil) temizle
+                broker.publish({'type': 'user_updated', 'user_id': user.id})
         else:
             logging.info(f"Creating new user: {user_name}")
             user = User(facebook_id=facebook_id, name=user_name)
@@ -302,6 +773,41 @@ def logout():
     flash("You have been logged out.", "info")
     return redirect(url_for('login_page'))  # Giriş sayfasına yönlendir
 
+@app.route('/metrics')
+def metrics():
+    """Bu worker'ın metriklerini Prometheus metin formatında döndürür."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+if QUIZ_TEST_LOGIN:
+    # Yük testi rotaları: yalnızca QUIZ_TEST_LOGIN=1 iken tanımlanır
+    @app.route('/test/login')
+    def test_login():
+        """Facebook'a gitmeden `name` adlı test kullanıcısıyla giriş yapar."""
+        name = request.args.get('name', '').strip()[:100]
+        if not name:
+            return {'error': 'name is required'}, 400
+        facebook_id = f"test:{name}"
+        user = User.query.filter_by(facebook_id=facebook_id).first()
+        if not user:
+            user = User(facebook_id=facebook_id, name=name)
+            db.session.add(user)
+            db.session.commit()
+        session['user_id'] = user.id
+        session['user_name'] = user.name
+        return {'user_id': user.id}
+
+    @app.route('/test/stats')
+    def test_stats():
+        """Süreç sayaçları: çalıştırılan SQL ifadesi sayısı, RSS ve bağlantı sayısı."""
+        try:
+            with open('/proc/self/statm') as f:
+                rss_kb = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+        except (OSError, ValueError):
+            rss_kb = None  # /proc olmayan sistemler
+        return {'db_statements': DB_QUERIES.value(), 'rss_kb': rss_kb,
+                'connected_users': len(connected_users), 'pending_answers': answer_buffer.pending()}
+
+    logging.warning("QUIZ_TEST_LOGIN is enabled: /test/login lets anyone log in without Facebook.")
 
 # Cevap gönderme rotasını da giriş kontrolü ile güncelle
 @app.route('/submit_answer', methods=['POST'])
@@ -320,40 +826,29 @@ def submit_answer():
             flash("Please select an answer.", "warning")
             return redirect(url_for('index'))
 
-        # Global state'deki soru ile karşılaştır
-        global current_question_data
-        active_question_id = current_question_data.get("question_id")
-        active_question = current_question_data.get("question")  # Question nesnesi
-
-        # Zamanında mı cevapladı ve doğru soruya mı?
-        if not active_question_id or str(submitted_question_id) != str(active_question_id):
+        room = (rooms.get(normalize_room_name(request.form.get('room')) or session.get('room') or QUIZ_DEFAULT_ROOM)
+                or rooms.get(QUIZ_DEFAULT_ROOM))  # Oda bu arada kapatılmış olabilir
+        answer_started = time.perf_counter()
+        status, _ = process_answer(room, user.id, user.name, submitted_question_id, user_answer)
+        ANSWER_SECONDS.observe(time.perf_counter() - answer_started, transport='http')
+        ANSWERS.inc(status=status)
+        if status == 'stale':
             flash("Too late, or answer submitted for a previous question!", "info")
-            return redirect(url_for('index'))
-
-        # Zaman kontrolü (opsiyonel ama iyi fikir)
-        # if datetime.now() > current_question_data.get("end_time"):
-        #     flash("Time is up for this question!", "info")
-        #     return redirect(url_for('index'))
-
-        # Veritabanından doğru cevabı al (global state'de tutmak yerine)
-        # Bu, state'i daha hafif tutar.
-        correct_q_from_db = Question.query.get(active_question_id)
-        if not correct_q_from_db:
+        elif status == 'late':
+            flash("Time is up for this question!", "info")
+        elif status == 'duplicate':
+            flash("You have already answered this question.", "info")
+        elif status == 'rate_limited':
+            flash("Too many answers, please slow down.", "warning")
+        elif status == 'invalid':
+            flash("Please select one of the listed answers.", "warning")
+        elif status == 'unverifiable':
             flash("Could not verify the answer for the current question.", "danger")
-            return redirect(url_for('index'))
-
-        is_correct = (user_answer == correct_q_from_db.correct_answer)
-
-        logging.info(f"User {user.name} submitted '{user_answer}' for Q_ID {active_question_id}. Correct: {is_correct}")
-
-        # Skorlama mantığı buraya eklenebilir (örneğin ayrı bir Score tablosu ile)
-        if is_correct:
-            # TODO: Kullanıcının skorunu güncelle (veritabanında?)
+        elif status == 'correct':
             flash("Correct!", "success")
-            pass
         else:
-            flash(f"Incorrect. The correct answer was: {correct_q_from_db.correct_answer}", "danger")
-            pass
+            # Doğru cevap 'reveal' fazına kadar gizli kalır (ikinci hesapla kopya çekilemesin)
+            flash("Incorrect. The correct answer will be shown when time is up.", "danger")
 
         # Cevap gönderildikten sonra ana sayfaya yönlendir.
         # Kullanıcı yeni soruyu SocketIO üzerinden alacak.
@@ -372,159 +867,615 @@ def submit_answer():
 #     pass
 
 # --- SocketIO Event Handlers ---
+def resolve_room(requested_name):
+    """İstenen odayı döndürür; bilinmeyen oda yalnızca dinamik odalar açıksa oluşturulur.
+
+    Bu worker'da ilk kez açılan oda için lidere 'open_room' yayınlanır ki
+    odanın saati başlasın.
+    """
+    name = normalize_room_name(requested_name) or QUIZ_DEFAULT_ROOM
+    room = rooms.get(name)
+    if room is None:
+        if not QUIZ_DYNAMIC_ROOMS:
+            return rooms.get(QUIZ_DEFAULT_ROOM)
+        room = rooms.get_or_create(name)
+        if room is None:
+            logging.warning(f"Room limit reached, sending client to default room instead of '{name}'.")
+            return rooms.get(QUIZ_DEFAULT_ROOM)
+        broker.publish({'type': 'open_room', 'room': room.name})
+    return room
+
 @socketio.on('connect')
 def handle_connect():
+    # Yeniden bağlanma seline karşı kullanıcı (yoksa IP) başına token bucket; DB'ye gitmeden önce
+    if not connect_limiter.allow(session.get('user_id') or request.remote_addr):
+        RATE_LIMITED.inc(event='connect')
+        logging.warning(f"Rejected SocketIO connection from {request.remote_addr}: connect rate limit exceeded.")
+        return False  # Bağlantıyı reddet
     user = get_current_user()
     if user:
-        logging.info(f"User {user.name} connected via SocketIO.")
-        # Yeni bağlanan kullanıcıya mevcut soruyu gönder
-        global current_question_data
-        if current_question_data.get("question"):
-            question_payload = current_question_data["question"].to_dict()
-            question_payload["end_time"] = current_question_data["end_time"].isoformat() if current_question_data.get("end_time") else None
-            emit('new_question', question_payload)  # Sadece bağlanan kişiye gönder
-            logging.info(f"Sent current question {current_question_data['question_id']} to newly connected user {user.name}")
+        room = resolve_room(request.args.get('room') or session.get('room'))
+        join_room(room.name)
+        rooms.track_client(room.name, 1)
+        # Kimliği ve odayı bağlantı başına bir kez çöz, sonraki olaylarda tekrar kullan
+        connected_users[request.sid] = (user, room.name)
+        logging.debug(f"User {user.name} connected via SocketIO to room {room.name}.")
+        # Yeni bağlanan kullanıcıya odanın mevcut sorusunu gönder
+        snapshot = room.state.get("snapshot")
+        if snapshot:
+            # Tur paketi hazır kodlanmış; yalnızca kalan süre bu istemci için hesaplanır
+            emit('new_question', (snapshot.data, snapshot.remaining_ms()))  # Sadece bağlanan kişiye gönder
+            EMITS.inc(event='new_question')
+            logging.debug(f"Sent current question {room.state['question_id']} to newly connected user {user.name}")
+        emit('leaderboard', {'top': room.leaderboard.top(LEADERBOARD_SIZE)})
+        EMITS.inc(event='leaderboard')
     else:
         logging.warning("Unauthenticated user connected via SocketIO.")
         # Giriş yapmamış kullanıcıları belki disconnect edebiliriz? Şimdilik loglayalım.
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    user = get_current_user()
-    logging.info(f"User {user.name if user else 'Unknown'} disconnected from SocketIO.")
+    user, room_name = connected_users.pop(request.sid, (None, None))
+    if room_name:
+        rooms.track_client(room_name, -1)
+    logging.debug(f"User {user.name if user else 'Unknown'} disconnected from SocketIO.")
+
+@socketio.on('submit_answer')
+def handle_submit_answer(data):
+    """Açık SocketIO bağlantısı üzerinden cevap alır, küçük bir ack ile yanıtlar.
+
+    Form POST + yönlendirme + sayfa render yerine tek bir mesaj; HTTP rotası
+    yedek olarak kalır.
+    """
+    user, room_name = connected_users.get(request.sid, (None, None))
+    if not user:
+        return {'status': 'unauthenticated'}
+    if not isinstance(data, dict) or not isinstance(data.get('answer'), str) or not data['answer']:
+        return {'status': 'invalid'}
+
+    room = rooms.get(room_name)
+    answer_started = time.perf_counter()
+    try:
+        status, _ = process_answer(room, user.id, user.name, data.get('question_id'), data.get('answer'))
+    except Exception:
+        logging.exception(f"Error in socket submit_answer for user {user.id}:")
+        ANSWERS.inc(status='error')
+        return {'status': 'error'}
+    ANSWER_SECONDS.observe(time.perf_counter() - answer_started, transport='socket')
+    ANSWERS.inc(status=status)
+
+    # Doğru cevap burada gönderilmez; tüm odaya 'reveal' ile süre dolunca açıklanır
+    ack = {'status': status}
+    if status in ('correct', 'incorrect'):
+        ranking = room.leaderboard.rank(user.id)
+        if ranking:
+            ack['rank'], ack['score'] = ranking
+    return ack
 
 # --- Background Task for Quiz Timer ---
+def handle_quiz_event(message):
+    """Broker'dan gelen olayı yerel oda durumuna uygular ve odadaki istemcilere yayınlar.
+
+    Lider süreç dahil her worker tur bilgisini buradan alır; böylece tüm
+    worker'lar her odada aynı aktif soruyu ve aynı skor tablosunu görür.
+    """
+    kind = message.get('type')
+    if kind == 'user_updated':
+        identity_cache.invalidate(message['user_id'])
+        return
+
+    if kind in ('open_room', 'new_question'):
+        room = rooms.get_or_create(message['room'])
+        if room is None:
+            logging.warning(f"Room limit reached, ignoring {kind} event for room {message['room']}.")
+            return
+    else:
+        room = rooms.get(message['room'])
+        if room is None:
+            return  # Kapatılmış oda
+
+    if kind == 'score':
+        room.idle_rounds = 0
+        # Aynı kullanıcı farklı worker'lardan (ör. socket + HTTP yedeği) cevap verse de tek puan
+        if room.scored.claim(message.get('round_id'), message['user_id']):
+            room.leaderboard.add(message['user_id'], message['points'], message.get('name'))
+            # Tur sonu istatistikleri cevap geldikçe güncellenir; süre dolunca tablo taranmaz
+            stats = room.stats
+            if stats is not None and stats.round_id == message.get('round_id'):
+                stats.add(message.get('answer'), message.get('correct'), message.get('elapsed_ms'),
+                          message['user_id'], message.get('name'))
+            log_event(message)
+    elif kind == 'open_room':
+        # Yalnızca lider süreçte zamanlayıcı vardır
+        scheduler = room_scheduler
+        if scheduler is not None and room.name not in scheduler:
+            scheduler.add(room.name, ROUND_PHASES)
+            logging.info(f"Timer: Opened room {room.name} ({len(scheduler)} rooms running).")
+    elif kind == 'room_active':
+        room.idle_rounds = 0
+    elif kind == 'close_room':
+        closed = rooms.remove(room.name)
+        if closed is not None:
+            if len(closed.leaderboard):
+                archived_leaderboards[closed.name] = closed.leaderboard
+            logging.info(f"Closed idle room {closed.name} ({len(rooms)} rooms open).")
+        elif room.local_clients:
+            # Bu worker'da oyuncu var: lider odayı yeniden açsın
+            broker.publish({'type': 'open_room', 'room': room.name})
+    elif kind == 'new_question':
+        with app.app_context():
+            question_record = question_bank.get(message['question_id'])
+            if question_record is None:
+                # Lider daha yeni bir soru bankası görüyor olabilir
+                question_bank.refresh()
+                question_record = question_bank.get(message['question_id'])
+        if question_record is None:
+            logging.warning(f"Received round for unknown question ID: {message['question_id']}")
+            return
+
+        # Kalan süre bu sürecin monotonic saatine çevrilir (worker'ların duvar saatine güvenmeyiz)
+        remaining_seconds = message['remaining_ms'] / 1000
+        # Paketi bu tur için bir kez kodla; yayın ve geç katılanlar aynı bytes'ı kullanır
+        snapshot = build_snapshot(question_record.payload, message['round_id'], message['end_time'],
+                                  remaining_seconds, ROUND_PAYLOAD_ENCODING)
+        room.state["question"] = question_record
+        room.state["question_id"] = question_record.id
+        room.state["round_id"] = message['round_id']
+        room.answered.reset(message['round_id'])
+        room.stats = RoundStats(message['round_id'], question_record.id, question_record.payload['options'])
+        log_event(message)
+        room.state["end_time"] = datetime.fromisoformat(message['end_time'])
+        room.state["snapshot"] = snapshot
+
+        # Bu worker'da odaya bağlı istemcilere yeni soruyu gönder
+        ROUNDS.inc(room=room.name)
+        broadcast('new_question', (snapshot.data, snapshot.remaining_ms()), room.name)
+        if room.local_clients and room.name not in rooms.pinned:
+            broker.publish({'type': 'room_active', 'room': room.name})  # Lider odayı boşta saymasın
+    elif kind == 'reveal':
+        # Süre ve ek süre doldu: önce günlüğü, sonra önceki turun cevaplarını yazdır, doğru cevabı açıkla
+        if event_buffer is not None:
+            event_buffer.request_flush()
+        answer_buffer.request_flush()
+        question_record = room.state.get("question")
+        if question_record and room.state.get("round_id") == message['round_id']:
+            log_event(message, question_id=question_record.id, correct_answer=question_record.correct_answer)
+            broadcast('reveal', {'question_id': question_record.id,
+                                 'correct_answer': question_record.correct_answer}, room.name)
+            stats = room.stats
+            if stats is not None and stats.round_id == message['round_id']:
+                broadcast('answer_stats', stats.to_dict(), room.name)
+    elif kind == 'leaderboard':
+        broadcast('leaderboard', {'top': room.leaderboard.top(LEADERBOARD_SIZE)}, room.name)
+    elif kind == 'intermission':
+        broadcast('intermission', {'next_round_ms': message['next_round_ms']}, room.name)
+
+broker.subscribe(handle_quiz_event)
+
+# Tur fazları: soru (+ağ gecikmesi payı), açıklama, skor tablosu, ara
+ROUND_PHASES = [
+    ('question', QUESTION_DURATION + ANSWER_GRACE_SECONDS),
+    ('reveal', REVEAL_DURATION),
+    ('leaderboard', LEADERBOARD_DURATION),
+    ('intermission', INTERMISSION_DURATION),
+]
+
+def run_room_phase(tick):
+    """Bir odanın zamanı gelen fazını broker üzerinden yayınlar (lider süreçte çalışır)."""
+    room = rooms.get(tick.key)
+    if room is None:
+        return
+    if tick.phase == 'question':
+        if (QUIZ_ROOM_IDLE_ROUNDS and room.name not in rooms.pinned and not room.local_clients
+                and room.idle_rounds >= QUIZ_ROOM_IDLE_ROUNDS):
+            # Son turlarda hiçbir worker'da istemci ve cevap yok: saati durdur, odayı her yerde kapat
+            scheduler = room_scheduler
+            if scheduler is not None:
+                scheduler.remove(room.name)
+            broker.publish({'type': 'close_room', 'room': room.name})
+            return
+        room.idle_rounds += 1
+        # Odanın destesinden bir sonraki soruyu al (O(1), veritabanına gitmeden);
+        # tüm sorular sorulmadan hiçbir soru tekrar gelmez
+        next_question = room.deck.next()
+        if not next_question:
+            logging.warning(f"Timer: No questions found in the database for room {room.name}!")
+            room.round_id = None
+            return
+
+        # Bitiş anı mutlak planlanmış zamandan hesaplanır (ek süre istemciye gösterilmez)
+        remaining = tick.start + QUESTION_DURATION - time.monotonic()
+        end_time = datetime.now() + timedelta(seconds=remaining)
+        room.round_id = f"{room.name}:{next_question.id}-{int(time.time() * 1000)}"
+        broker.publish({
+            'type': 'new_question',
+            'room': room.name,
+            'question_id': next_question.id,
+            'round_id': room.round_id,
+            'end_time': end_time.isoformat(),
+            'remaining_ms': int(remaining * 1000),
+        })
+        logging.info(f"Timer: Published new_question Q_ID {next_question.id} for room {room.name} "
+                     f"(jitter {tick.jitter * 1000:.1f} ms)")
+    elif room.round_id is None:
+        return  # Bu turda soru yoksa diğer fazlar atlanır
+    elif tick.phase == 'reveal':
+        broker.publish({'type': 'reveal', 'room': room.name, 'round_id': room.round_id})
+    elif tick.phase == 'leaderboard':
+        broker.publish({'type': 'leaderboard', 'room': room.name, 'round_id': room.round_id})
+    elif tick.phase == 'intermission':
+        next_round_ms = int(max(0, tick.deadline - time.monotonic()) * 1000)
+        broker.publish({'type': 'intermission', 'room': room.name, 'round_id': room.round_id,
+                        'next_round_ms': next_round_ms})
+
 def background_quiz_timer():
-    """Arka planda çalışarak periyodik olarak yeni soru gönderir."""
-    global current_question_data
-    last_question_id = None
-    logging.info("Background quiz timer thread started.")
+    """Lider süreçte tüm odaların tur fazlarını tek bir heap zamanlayıcı ile yayınlar.
+
+    Faz sınırları mutlak monotonic zamanlardır; sorgu ve yayın süresi bir
+    sonraki tura eklenmez (kayma yok). Liderlik kaybedilirse döner; tur durumu
+    broker üzerinden tüm worker'lara gider.
+    """
+    global room_scheduler
+    scheduler = PhaseScheduler()
+    for room in rooms.all():
+        round_start = restored_rounds.pop(room.name, None)
+        if round_start is not None and round_start + ROUND_PHASES[0][1] > time.monotonic():
+            # Geri yüklenen açık tur: yeni soru yerine açıklama fazından devam et
+            scheduler.add(room.name, ROUND_PHASES, start=round_start, first_phase=1)
+        else:
+            scheduler.add(room.name, ROUND_PHASES)
+    last_check = {'jitter_log': time.monotonic()}
+    logging.info(f"Background quiz timer started for {len(scheduler)} rooms (this process owns the quiz clock).")
+
+    def on_tick(tick):
+        now = time.monotonic()
+        if now - last_check['jitter_log'] >= JITTER_LOG_INTERVAL:
+            last_check['jitter_log'] = now
+            logging.info(f"Timer: Schedule jitter over {len(scheduler)} rooms: {scheduler.jitter.summary()}")
+        TIMER_JITTER_SECONDS.observe(max(0.0, tick.jitter))
+        try:
+            run_room_phase(tick)
+        except Exception as e:
+            logging.exception(f"Timer: Error in background quiz timer for room {tick.key}:")
+        TIMER_TICK_SECONDS.observe(time.monotonic() - now, phase=tick.phase)
+
+    def on_leadership_lost():
+        logging.warning("Timer: Lost quiz clock leadership, stopping timer.")
+        scheduler.stop()
+
+    # Liderlik faz sürelerinden bağımsız olarak ayrı bir thread'de yenilenir
+    heartbeat = start_heartbeat(election, on_leadership_lost)
+    room_scheduler = scheduler
+    try:
+        with app.app_context():  # Veritabanı erişimi için app context gerekli
+            scheduler.run(stop_event, on_tick)
+    finally:
+        heartbeat.set()
+        room_scheduler = None
+    logging.info("Background quiz timer stopped.")
+
+
+def quiz_clock_supervisor():
+    """Liderliği almaya çalışır; lider olunca zamanlayıcıyı çalıştırır, kaybedince tekrar bekler."""
+    while wait_for_leadership(election, stop_event):
+        background_quiz_timer()
+    election.release()
 
-    with app.app_context():  # Veritabanı erişimi için app context gerekli
-        while not stop_event.is_set():
-            try:
-                # Veritabanından bir sonraki soruyu al (basit sıralama veya rastgele)
-                # Önceki sorudan farklı bir soru seçmeye çalışalım
-                query = Question.query
-                if last_question_id:
-                    query = query.filter(Question.id != last_question_id)
-
-                # Basitçe sıradaki ID'yi alalım (daha sofistike olabilir)
-                next_question = query.order_by(Question.id).first()
-                if not next_question:
-                    # Soru kalmadıysa veya ilk soruysa, baştan başla
-                    next_question = Question.query.order_by(Question.id).first()
-
-                if next_question:
-                    if next_question.id != last_question_id:
-                        logging.info(f"Timer: Selecting new question ID: {next_question.id}")
-                        current_question_data["question"] = next_question
-                        current_question_data["question_id"] = next_question.id
-                        current_question_data["end_time"] = datetime.now() + timedelta(seconds=QUESTION_DURATION)
-                        last_question_id = next_question.id
-
-                        # Tüm bağlı istemcilere yeni soruyu gönder
-                        question_payload = next_question.to_dict()
-                        question_payload["end_time"] = current_question_data["end_time"].isoformat()
-                        socketio.emit('new_question', question_payload)
-                        logging.info(f"Timer: Emitted new_question event for Q_ID: {next_question.id}")
-                    else:
-                        # Tek soru varsa veya bir hata olduysa logla
-                        logging.debug("Timer: No new question found or same question selected.")
-                        # Eğer tek soru varsa, süreyi yine de güncelleyebiliriz
-                        current_question_data["end_time"] = datetime.now() + timedelta(seconds=QUESTION_DURATION)
-                        question_payload = current_question_data["question"].to_dict()
-                        question_payload["end_time"] = current_question_data["end_time"].isoformat()
-                        socketio.emit('new_question', question_payload)  # Süre güncellemesi için tekrar gönder
-
-
-                else:
-                    logging.warning("Timer: No questions found in the database!")
-                    # Soru yoksa bir süre bekle
-                    stop_event.wait(QUESTION_DURATION)  # Hata durumunda CPU'yu yormamak için bekle
-                    continue  # Döngünün başına dön
-
-            except Exception as e:
-                logging.exception("Timer: Error in background quiz timer loop:")
-                # Hata durumunda biraz bekle
-                stop_event.wait(5)
-
-            # Bir sonraki soruya geçmeden önce bekle
-            logging.debug(f"Timer: Waiting for {QUESTION_DURATION} seconds.")
-            stop_event.wait(QUESTION_DURATION)  # Belirlenen süre kadar bekle
-
-    logging.info("Background quiz timer thread stopped.")
 
+def warm_caches():
+    """Soru bankasını ve statik dosyaları (sıkıştırılmış halleriyle) önceden yükler."""
+    with app.app_context():
+        question_bank.refresh()
+    if len(question_bank) == 0:
+        logging.warning("No questions found in the database. Run 'flask db-seed' command.")
+    static_assets.preload()
+
+def quiz_worker_main():
+    """Worker açılışının yavaş kısmı; ardından quiz saati gözetmenine geçer.
+
+    Sıra önemlidir: kaybolan cevaplar olay günlüğünden yazılmadan skor tablosu
+    yüklenmez, skor tablosu yüklenmeden de broker'dan skor olayı alınmaz.
+    """
+    started = time.perf_counter()
+    try:
+        warm_caches()
+    except Exception:
+        logging.exception("Could not warm caches:")
+    with app.app_context():
+        try:
+            replay_event_log()
+        except Exception:
+            logging.exception("Could not replay the event log:")
+        try:
+            load_leaderboard()
+        except Exception:
+            logging.exception("Could not load leaderboard from the database:")
+    broker.start()
+    logging.info(f"Worker startup tasks finished in {(time.perf_counter() - started) * 1000:.0f} ms.")
+    quiz_clock_supervisor()
 
 def start_quiz_timer():
-    """Arka plan görevini başlatır."""
+    """Broker aboneliğini, cevap yazıcısını ve quiz saati gözetmenini başlatır.
+
+    Her worker'da bir kez çağrılmalıdır (bkz. gunicorn.conf.py); saati yalnızca
+    lider seçilen süreç çalıştırır.
+    """
     global quiz_timer_thread
     if quiz_timer_thread is None or not quiz_timer_thread.is_alive():
         stop_event.clear()
-        quiz_timer_thread = threading.Thread(target=background_quiz_timer, daemon=True)
+        answer_buffer.start(stop_event)
+        if event_buffer is not None:
+            event_buffer.start(stop_event)
+        # Yavaş açılış işleri arka planda: worker bu sırada HTTP isteklerine cevap verir
+        quiz_timer_thread = threading.Thread(target=quiz_worker_main, daemon=True, name='quiz-startup')
         quiz_timer_thread.start()
         logging.info("Quiz timer background thread initiated.")
 
+@atexit.register
+def stop_quiz_timer():
+    """Zamanlayıcıyı durdurur ve bekleyen cevapların yazılmasını bekler."""
+    stop_event.set()
+    answer_buffer.join(timeout=10)
+    if event_buffer is not None:
+        event_buffer.join(timeout=10)
+    broker.close()
+
 # --- Veritabanı Yönetim Komutları ---
+def ensure_schema():
+    """Eksik tabloları oluşturur, sonradan eklenen nullable kolonları ve indeksleri ekler.
+
+    db.create_all() var olan tabloları değiştirmediği için yeni opsiyonel
+    kolonlar (ör. Question.category) burada ALTER TABLE ile, bu kolonların
+    indeksleri (ör. Question.external_id) CREATE INDEX ile eklenir.
+    """
+    db.create_all()
+    inspector = db.inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(db.text(
+                f"ALTER TABLE {preparer.quote(table.name)} ADD COLUMN {preparer.quote(column.name)} {column_type}"))
+            logging.info(f"Added missing column {table.name}.{column.name}.")
+    db.session.commit()
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine, checkfirst=True)
+                logging.info(f"Added missing index {index.name}.")
+    backfill_question_keys()
+
+# Şemayla birlikte çalışan veri düzeltmeleri; yenisi eklenince parmak izi değişir ve kontrol tekrar çalışır
+SCHEMA_DATA_MIGRATIONS = ('question.external_id=stable_key',)
+
+def backfill_question_keys():
+    """external_id kolonu eklenmeden önceki soruları (NULL) soru metninden stable_key ile anahtarlar.
+
+    İçe aktarma ve db-seed kimliksiz satırları aynı anahtarla eşleştirdiği
+    için eski sorular tekrar eklenmez. Aynı metinli ikinci bir eski soru
+    anahtarsız kalır (external_id benzersizdir).
+    """
+    from question_import import stable_key
+    rows = db.session.execute(db.select(Question.id, Question.question_text)
+                              .where(Question.external_id.is_(None)).order_by(Question.id)).all()
+    if not rows:
+        return
+    keys = {question_id: stable_key(question_text) for question_id, question_text in rows}
+    taken = set()
+    candidates = list(set(keys.values()))
+    for start in range(0, len(candidates), 500):
+        taken.update(db.session.scalars(db.select(Question.external_id)
+                                        .where(Question.external_id.in_(candidates[start:start + 500]))))
+    updates = []
+    for question_id, key in keys.items():
+        if key not in taken:
+            taken.add(key)
+            updates.append({'id': question_id, 'external_id': key})
+    if updates:
+        db.session.execute(db.update(Question), updates)
+    db.session.commit()
+    logging.info(f"Backfilled external_id for {len(updates)} questions"
+                 f" ({len(rows) - len(updates)} duplicates left without one).")
+
+def schema_fingerprint():
+    """Modellerin tablo, kolon ve indeks tanımlarından hash; modeller değişmedikçe aynı kalır."""
+    parts = []
+    for table in db.metadata.sorted_tables:
+        parts.append(table.name)
+        parts.extend(f"{column.name}:{column.type}:{column.nullable}" for column in table.columns)
+        parts.extend(sorted(index.name for index in table.indexes))
+    parts.extend(SCHEMA_DATA_MIGRATIONS)
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+@contextmanager
+def schema_lock():
+    """Aynı anda açılan süreçler şemayı birlikte değiştirmesin (PostgreSQL: advisory lock, diğerleri: flock)."""
+    if db.engine.dialect.name == 'postgresql':
+        with db.engine.connect() as conn:
+            conn.execute(db.text("SELECT pg_advisory_lock(hashtext('cafe_quiz:schema'))"))
+            try:
+                yield
+            finally:
+                conn.execute(db.text("SELECT pg_advisory_unlock(hashtext('cafe_quiz:schema'))"))
+        return
+    os.makedirs(app.instance_path, exist_ok=True)
+    with open(os.path.join(app.instance_path, 'schema.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def ensure_schema_once(force=False):
+    """ensure_schema'yı dağıtım başına bir kez çalıştırır; kontrol yapıldıysa True döner.
+
+    Kontrol edilen şemanın parmak izi schema_version tablosuna yazılır; aynı
+    modellerle açılan sonraki süreçler (worker'lar, yeniden başlatmalar, diğer
+    makineler) tabloları incelemek yerine tek bir SELECT ile geçer.
+    """
+    if SCHEMA_CHECK == 'never' and not force:
+        return False
+    fingerprint = schema_fingerprint()
+
+    def already_applied():
+        if force or SCHEMA_CHECK == 'always':
+            return False
+        try:
+            return db.session.get(SchemaVersion, fingerprint) is not None
+        except DBAPIError:
+            db.session.rollback()  # schema_version tablosu henüz yok (ilk kurulum)
+            return False
+
+    if already_applied():
+        return False
+    with schema_lock():
+        if already_applied():  # Kilidi beklerken başka bir süreç kontrol etmiş olabilir
+            return False
+        ensure_schema()
+        db.session.merge(SchemaVersion(fingerprint=fingerprint))
+        db.session.commit()
+    logging.info(f"Database schema checked (fingerprint {fingerprint[:12]}).")
+    return True
+
 # db-create ve db-seed komutları aynı kalıyor,
 # ancak User tablosunu da oluşturacaklar.
 @app.cli.command('db-create')
 def db_create():
-    """Veritabanı tablolarını (User ve Question) oluşturur."""
+    """Veritabanı tablolarını (User, Question ve Answer) oluşturur, eksik kolonları ekler."""
     with app.app_context():
         try:
-            db.create_all()
-            print("Database tables (User, Question) created successfully!")
+            ensure_schema_once(force=True)
+            print("Database tables (User, Question, Answer) created successfully!")
         except Exception as e:
             print(f"Error creating database tables: {e}")
 
 @app.cli.command('db-seed')
 def db_seed():
-    # ... (Önceki seed içeriği aynı) ...
+    """Örnek soruları ekler; tekrar çalıştırmak aynı soruları günceller (silmez).
+
+    Örnekler, eski kayıtlarla aynı şekilde soru metninden (stable_key) anahtarlanır.
+    """
+    from question_import import import_questions  # Yalnızca CLI'da gerekir
     # Kullanıcı eklemeye gerek yok, login ile oluşacaklar.
-    # Sadece soru ekleme kısmı kalabilir.
+    sample_questions = [
+        {'question_text': "What is the capital of France?",
+         'option1': "Berlin", 'option2': "Madrid", 'option3': "Paris", 'option4': "Rome", 'correct_answer': "Paris"},
+        {'question_text': "Which planet is known as the Red Planet?",
+         'option1': "Earth", 'option2': "Mars", 'option3': "Jupiter", 'option4': "Venus", 'correct_answer': "Mars"},
+        {'question_text': "What is the largest ocean on Earth?",
+         'option1': "Atlantic", 'option2': "Indian", 'option3': "Arctic", 'option4': "Pacific", 'correct_answer': "Pacific"},
+        {'question_text': "What is 2 + 2 * 2?",
+         'option1': "4", 'option2': "6", 'option3': "8", 'option4': "2", 'correct_answer': "6"},
+    ]
     with app.app_context():
         try:
-            num_deleted = db.session.query(Question).delete()
-            print(f"Deleted {num_deleted} existing questions before seeding.")
-
-            # --- Sample Questions ---
-            q1 = Question(question_text="What is the capital of France?",
-                          option1="Berlin", option2="Madrid", option3="Paris", option4="Rome",
-                          correct_answer="Paris")
-            q2 = Question(question_text="Which planet is known as the Red Planet?",
-                          option1="Earth", option2="Mars", option3="Jupiter", option4="Venus",
-                          correct_answer="Mars")
-            q3 = Question(question_text="What is the largest ocean on Earth?",
-                          option1="Atlantic", option2="Indian", option3="Arctic", option4="Pacific",
-                          correct_answer="Pacific")
-            q4 = Question(question_text="What is 2 + 2 * 2?",
-                          option1="4", option2="6", option3="8", option4="2",
-                          correct_answer="6")
-            # --- End Sample Questions ---
-
-            db.session.add_all([q1, q2, q3, q4])
-            db.session.commit()
-            print(f"Database seeded with {Question.query.count()} initial questions!")
+            import_questions(enumerate(sample_questions, start=1), upsert_questions)
+            question_bank.invalidate()  # Toplu insert mapper olaylarını tetiklemez
+            print(f"Database seeded; {Question.query.count()} questions in the bank.")
         except Exception as e:
             db.session.rollback()
             print(f"Error seeding database: {e}")
 
+@app.cli.command('questions-import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help="Defaults to the file extension.")
+@click.option('--batch-size', default=1000, show_default=True, help="Rows per bulk upsert.")
+@click.option('--max-errors', default=20, show_default=True, help="How many invalid rows to print.")
+def questions_import(path, fmt, batch_size, max_errors):
+    """CSV / JSON Lines soru dosyasını akış halinde okuyup external_id'ye göre upsert eder."""
+    from question_import import import_questions, iter_rows  # Yalnızca CLI'da gerekir
+    errors_shown = []
+
+    def report_error(line_no, error):
+        if len(errors_shown) < max_errors:
+            errors_shown.append(line_no)
+            print(f"Line {line_no}: skipped ({error})")
+
+    with app.app_context():
+        try:
+            stats = import_questions(iter_rows(path, fmt), upsert_questions, batch_size=batch_size,
+                                     on_error=report_error)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            question_bank.invalidate()  # Yazılmış parçalar olabilir; soru bankası yeniden yüklensin
+    print(f"Imported {stats['written']} questions from {stats['read']} rows "
+          f"({stats['invalid']} invalid, {stats['batches']} batches) in {stats['seconds']:.2f}s "
+          f"- {stats['rows_per_sec']:.0f} rows/sec.")
+
+@app.cli.command('events-report')
+@click.option('--hours', type=float, help="Only events from the last N hours.")
+@click.option('--room', help="Only this room.")
+@click.option('--top', default=20, show_default=True, help="Questions to list (most answered first).")
+@click.option('--json', 'as_json', is_flag=True, help="Print the full report as JSON.")
+@click.option('--directory', default=EVENT_LOG_DIR, show_default=True, help="Event log directory.")
+def events_report(hours, room, top, as_json, directory):
+    """Olay günlüğünü akış halinde okuyup soru başına doğruluk ve cevap süresi dağılımını raporlar."""
+    since = time.time() - hours * 3600 if hours else None
+    per_question, overall = summarize_answers(iter_events(directory, since=since), room=normalize_room_name(room))
+    if as_json:
+        print(json.dumps({'overall': overall.to_dict(),
+                          'questions': {str(qid): stats.to_dict() for qid, stats in per_question.items()}}, indent=2))
+        return
+    summary = overall.to_dict()
+    print(f"{summary['answers']} answers to {len(per_question)} questions, accuracy {summary['accuracy']}, "
+          f"answer time p50 <= {summary['p50_ms']} ms, p90 <= {summary['p90_ms']} ms")
+    print(f"{'question':>8} {'answers':>8} {'accuracy':>9} {'mean ms':>8} {'p50 ms':>7} {'p90 ms':>7}")
+    ranked = sorted(per_question.items(), key=lambda item: item[1].answers, reverse=True)[:top]
+    for question_id, stats in ranked:
+        row = stats.to_dict()
+        print(f"{question_id!s:>8} {row['answers']:>8} {row['accuracy']:>9} {row['mean_ms']!s:>8} "
+              f"{row['p50_ms']!s:>7} {row['p90_ms']!s:>7}")
+
+@app.cli.command('answer-stats')
+@click.option('--hours', type=float, help="Only events from the last N hours.")
+@click.option('--room', help="Only this room.")
+@click.option('--question', 'question_ids', type=int, multiple=True, help="Only these question IDs (repeatable).")
+@click.option('--chunk-size', default=100000, show_default=True, help="Answers per NumPy batch.")
+@click.option('--directory', default=EVENT_LOG_DIR, show_default=True, help="Event log directory.")
+def answer_stats(hours, room, question_ids, chunk_size, directory):
+    """Tur sonunda yayınlanan answer_stats istatistiklerini geçmiş cevaplar üzerinde toplu hesaplar (JSON).
+
+    Cevap süresi yalnızca olay günlüğünde tutulduğu için kaynak olay
+    günlüğüdür; seçenekler soru bankasından alınır. NumPy gerektirir.
+    """
+    try:
+        import numpy  # noqa: F401  Opsiyonel bağımlılık; yoksa anlaşılır bir hata ver
+    except ImportError:
+        raise click.ClickException("answer-stats needs NumPy: pip install numpy")
+    since = time.time() - hours * 3600 if hours else None
+    room_name = normalize_room_name(room)
+    with app.app_context():
+        ids = question_ids or question_bank.ordered_ids()
+        options_by_question = {}
+        for question_id in ids:
+            question_record = question_bank.get(question_id)
+            if question_record is not None:
+                options_by_question[question_record.id] = question_record.payload['options']
+    answers = ((event.get('question_id'), event.get('answer'), event.get('correct'), event.get('elapsed_ms'))
+               for event in iter_events(directory, since=since)
+               if event.get('type') == 'score' and event.get('question_id') in options_by_question
+               and (room_name is None or event.get('room') == room_name))
+    started = time.perf_counter()
+    stats = aggregate_history(answers, options_by_question, chunk_size=chunk_size)
+    logging.info(f"answer-stats: {len(stats)} questions aggregated in {time.perf_counter() - started:.2f}s.")
+    print(json.dumps({str(question_id): row for question_id, row in stats.items()}, indent=2, ensure_ascii=False))
+
 # Yerelde çalıştırma
 if __name__ == '__main__':
-    # Veritabanı tablolarının var olduğundan emin ol (opsiyonel, ama iyi fikir)
+    # Veritabanı tablolarının var olduğundan emin ol (modeller değişmediyse tek bir SELECT)
     with app.app_context():
         try:
-            # Sadece tablo yoksa oluşturmayı deneyebiliriz, ama create_all güvenli olmalı
-            db.create_all()
-            logging.info("Database tables checked/created.")
-            # Başlangıçta soru yoksa uyar
-            if Question.query.count() == 0:
-                logging.warning("No questions found in the database. Run 'flask db-seed' command.")
+            ensure_schema_once()
         except Exception as e:
             logging.error(f"Error during initial DB check/creation: {e}")
 
-    # Arka plan görevini başlat
+    # Arka plan görevini başlat (önbellek ısıtma ve soru kontrolü de arka planda yapılır)
     start_quiz_timer()
 
     # Uygulamayı SocketIO ile çalıştır
@@ -535,4 +1486,8 @@ if __name__ == '__main__':
     # Gunicorn gibi bir WSGI sunucusu production için daha iyidir.
     # socketio.run(app, debug=False, host='0.0.0.0', port=port)
     # Yerel test için debug'ı açalım ama dikkatli olalım:
-        socketio.run(app, debug=True, host='0.0.0.0', port=port, use_reloader=False)  # Reloader'ı kapatmak thread sorununu çözebilir
+    # allow_unsafe_werkzeug: terminal dışından (ör. benchmark.py) başlatıldığında da geliştirme sunucusu çalışsın
+    # FLASK_DEBUG=0 ile kapatılır (ör. benchmark.py): debug modu Jinja auto-reload'u, dolayısıyla iskelet önbelleğini kapatır
+    socketio.run(app, debug=os.environ.get('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=port,
+                 use_reloader=False,  # Reloader'ı kapatmak thread sorununu çözebilir
+                 allow_unsafe_werkzeug=True)
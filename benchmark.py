@@ -0,0 +1,341 @@
+"""Oyun gecesi yük testi: N oyuncuyu Socket.IO üzerinden simüle eder.
+
+Uygulamayı (varsayılan olarak geçici bir SQLite veritabanıyla) ayrı bir
+süreçte başlatır, QUIZ_TEST_LOGIN ile açılan /test/login rotasından N test
+kullanıcısıyla giriş yapar, her oyuncuyu Socket.IO ile bağlar ve her
+`new_question` olayına log-normal dağılımlı bir düşünme süresinden sonra
+cevap verir. Sonuçlar sürümler arası karşılaştırma için JSON dosyasına
+yazılır:
+
+    broadcast_latency_ms   yayın anından oyuncunun olayı almasına kadar geçen süre (p50/p95/p99/max)
+    broadcast_spread_ms    bir turda ilk ve son oyuncunun olayı alması arasındaki fark
+    answer_ack_ms          cevap gönderiminden ack gelmesine kadar geçen süre
+    answers_per_sec        cevapların aktığı süre boyunca sunucunun ack verme hızı
+    db_statements_per_round, rss_kb_per_connection (sunucunun /test/stats sayaçlarından)
+
+Örnekler:
+
+    python benchmark.py --players 500 --rounds 5
+    python benchmark.py --database-url postgresql://quiz@localhost/quiz_bench
+    python benchmark.py --server serve_async --players 2000    # gevent sunucusu (bkz. serve_async.py)
+    python benchmark.py --url http://127.0.0.1:5001 --players 200   # çalışan sunucuya (QUIZ_TEST_LOGIN=1 ile)
+
+Taşıma: `--transport auto` (varsayılan) istemcinin long-polling ile başlayıp
+mümkünse websocket'e geçmesine izin verir; `--transport websocket` yalnızca
+websocket kullanır ve istemci bağımlılığı yoksa hemen hata verir:
+`pip install "python-socketio[client]"`.
+"""
+import argparse
+import heapq
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+import socketio
+
+from round_payload import COMPACT_MAGIC, decode_compact
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentiles(values):
+    """Milisaniye listesinin p50/p95/p99/max özeti."""
+    if not values:
+        return {'count': 0, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+    return {'count': len(ordered), 'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99),
+            'max': round(ordered[-1], 3)}
+
+
+def decode_round(raw):
+    if isinstance(raw, (bytes, bytearray)):
+        return decode_compact(bytes(raw)) if raw[:2] == COMPACT_MAGIC else json.loads(raw)
+    return raw
+
+
+class AnswerScheduler:
+    """Cevapları tek bir thread'den, planlanan zamanda gönderir (oyuncu başına timer yerine)."""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='answer-scheduler', daemon=True)
+        self._thread.start()
+
+    def schedule(self, due, fn):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (due, self._seq, fn))
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._stopped:
+                    return
+                _, _, fn = heapq.heappop(self._heap)
+            try:
+                fn()
+            except Exception as e:  # Bağlantısı kopmuş oyuncu vb.
+                print(f"answer send failed: {e}", file=sys.stderr)
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.broadcast_ms = []
+        self.round_receipts = {}  # round_id -> [ilk alış, son alış, alan oyuncu sayısı]
+        self.ack_ms = []
+        self.ack_statuses = {}
+        self.answer_windows = {}  # round_id -> [ilk gönderim, son ack]
+
+    def record_round(self, round_id, latency_ms, received_at):
+        with self.lock:
+            self.broadcast_ms.append(latency_ms)
+            receipt = self.round_receipts.setdefault(round_id, [received_at, received_at, 0])
+            receipt[0] = min(receipt[0], received_at)
+            receipt[1] = max(receipt[1], received_at)
+            receipt[2] += 1
+
+    def record_ack(self, round_id, sent_at, status):
+        now = time.monotonic()
+        with self.lock:
+            self.ack_ms.append((now - sent_at) * 1000)
+            self.ack_statuses[status] = self.ack_statuses.get(status, 0) + 1
+            window = self.answer_windows.setdefault(round_id, [sent_at, now])
+            window[0] = min(window[0], sent_at)
+            window[1] = max(window[1], now)
+
+
+class Player:
+    def __init__(self, index, base_url, args, results, scheduler, transports):
+        self.name = f"bench-{index}"
+        self.base_url = base_url
+        self.args = args
+        self.results = results
+        self.scheduler = scheduler
+        self.transports = transports
+        self.rng = random.Random(index)
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('new_question', self.on_new_question)
+
+    def connect(self):
+        http = requests.Session()
+        response = http.get(f"{self.base_url}/test/login", params={'name': self.name}, timeout=10)
+        response.raise_for_status()
+        cookie = '; '.join(f"{key}={value}" for key, value in http.cookies.items())
+        self.client.connect(self.base_url, headers={'Cookie': cookie}, transports=self.transports,
+                            wait_timeout=10)
+
+    def on_new_question(self, raw, remaining_ms=None):
+        received_wall, received = time.time(), time.monotonic()
+        data = decode_round(raw)
+        if remaining_ms is not None:
+            # Sunucu end_time'ı ve gönderim anındaki kalan süreyi verir: gönderim anı = end_time - kalan süre
+            sent_wall = datetime.fromisoformat(data['end_time']).timestamp() - remaining_ms / 1000
+            self.results.record_round(data['round_id'], (received_wall - sent_wall) * 1000, received)
+        # Log-normal düşünme süresi, soru süresiyle sınırlı
+        think = min(self.rng.lognormvariate(self.args.think_mu, self.args.think_sigma),
+                    max(0.0, (remaining_ms or 0) / 1000 - 0.05))
+        answer = self.rng.choice(data['options'])
+        self.scheduler.schedule(received + think, lambda: self.send_answer(data['round_id'], data['id'], answer))
+
+    def send_answer(self, round_id, question_id, answer):
+        if not self.client.connected:
+            return
+        sent_at = time.monotonic()
+        self.client.emit('submit_answer', {'question_id': question_id, 'answer': answer},
+                         callback=lambda ack: self.results.record_ack(round_id, sent_at, (ack or {}).get('status')))
+
+    def disconnect(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+def start_server(args, port):
+    env = dict(os.environ,
+               PORT=str(port),
+               QUIZ_TEST_LOGIN='1',
+               DATABASE_URL=args.database_url,
+               QUESTION_DURATION=str(args.question_duration),
+               REVEAL_DURATION='1', LEADERBOARD_DURATION='1', INTERMISSION_DURATION='0.5',
+               ROUND_PAYLOAD_ENCODING=args.encoding,
+               # Önceki koşuların olay günlüğü yeni veritabanına geri oynatılmasın
+               EVENT_LOG_DIR=tempfile.mkdtemp(),
+               # app.py'nin debug modu iskelet önbelleğini kapatır; production gibi ölç
+               FLASK_DEBUG='0',
+               FLASK_APP='app.py')
+    env.pop('QUIZ_BROKER_URL', None)
+    subprocess.run([sys.executable, '-m', 'flask', 'db-create'], cwd=REPO_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    subprocess.run([sys.executable, '-m', 'flask', 'db-seed'], cwd=REPO_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    log = open(os.path.join(tempfile.gettempdir(), 'cafe_quiz_benchmark_server.log'), 'w')
+    server = subprocess.Popen([sys.executable, f"{args.server}.py"], cwd=REPO_DIR, env=env, stdout=log, stderr=log)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited during startup, see {log.name}")
+        try:
+            requests.get(f"{base_url}/login", timeout=1)
+            return server, base_url
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("Server did not start within 30 seconds")
+
+
+def server_stats(base_url):
+    return requests.get(f"{base_url}/test/stats", timeout=10).json()
+
+
+def wait_for_rounds(results, count, timeout):
+    """Ölçüme başladıktan sonra `count` yeni turun yayınlanmasını bekler."""
+    with results.lock:
+        seen = set(results.round_receipts)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with results.lock:
+            new_rounds = set(results.round_receipts) - seen
+        if len(new_rounds) >= count:
+            return new_rounds
+        time.sleep(0.1)
+    raise SystemExit(f"Timed out waiting for {count} rounds")
+
+
+def run(args):
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        server, base_url = start_server(args, args.port)
+
+    results = Results()
+    scheduler = AnswerScheduler()
+    transports = None if args.transport == 'auto' else [args.transport]  # None: istemci kendisi seçer
+    players = [Player(i, base_url, args, results, scheduler, transports) for i in range(args.players)]
+    try:
+        before = server_stats(base_url)
+        connect_started = time.monotonic()
+        for i, player in enumerate(players):
+            player.connect()
+            if args.connect_rate:
+                # Bağlantıları saniyede connect_rate olacak şekilde yay
+                delay = connect_started + (i + 1) / args.connect_rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        connect_seconds = time.monotonic() - connect_started
+        connected = server_stats(base_url)
+
+        # İlk tam turu bekle (bağlanma sırasında yarım kalan tur ölçüme girmesin)
+        wait_for_rounds(results, 1, timeout=args.round_timeout)
+        with results.lock:
+            results.broadcast_ms.clear()
+            results.ack_ms.clear()
+            results.ack_statuses.clear()
+            results.answer_windows.clear()
+        start_stats = server_stats(base_url)
+        measured = wait_for_rounds(results, args.rounds + 1, timeout=args.round_timeout * (args.rounds + 1))
+        end_stats = server_stats(base_url)
+    finally:
+        for player in players:
+            player.disconnect()
+        scheduler.stop()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    with results.lock:
+        # Son tur yalnızca ölçümün bitişini işaretler; cevapları tamamlanmamış olabilir
+        rounds = sorted(measured, key=lambda rid: results.round_receipts[rid][0])[:args.rounds]
+        spreads = [(results.round_receipts[rid][1] - results.round_receipts[rid][0]) * 1000 for rid in rounds]
+        # Yalnızca cevapların aktığı süre: her turda ilk gönderimden son ack'e kadar
+        answer_window = sum(last - first for first, last in results.answer_windows.values())
+        answers = len(results.ack_ms)
+        report = {
+            'players': args.players,
+            'rounds': len(rounds),
+            'connect_seconds': round(connect_seconds, 3),
+            'broadcast_latency_ms': percentiles(results.broadcast_ms),
+            'broadcast_spread_ms': percentiles(spreads),
+            'answer_ack_ms': percentiles(results.ack_ms),
+            'answer_statuses': dict(results.ack_statuses),
+            'answers_per_sec': round(answers / answer_window, 1) if answer_window else None,
+            'db_statements_per_round': round((end_stats['db_statements'] - start_stats['db_statements'])
+                                             / (args.rounds + 1), 2),
+            'rss_kb_before': before['rss_kb'],
+            'rss_kb_connected': connected['rss_kb'],
+            'rss_kb_per_connection': (round((connected['rss_kb'] - before['rss_kb']) / args.players, 2)
+                                      if before['rss_kb'] is not None and args.players else None),
+        }
+
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                  text=True).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        'revision': revision,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'params': {key: value for key, value in vars(args).items() if key != 'output'},
+        'results': report,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate Socket.IO players against the quiz app.")
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3, help="Measured rounds (after one warm-up round).")
+    parser.add_argument('--question-duration', type=float, default=5.0)
+    parser.add_argument('--think-mu', type=float, default=0.3, help="Log-normal think time mu (seconds, log scale).")
+    parser.add_argument('--think-sigma', type=float, default=0.6)
+    parser.add_argument('--connect-rate', type=float, default=200, help="New connections per second (0 = no limit).")
+    parser.add_argument('--transport', choices=['auto', 'websocket', 'polling'], default='auto',
+                        help="auto negotiates (polling, upgraded to websocket when available).")
+    parser.add_argument('--encoding', choices=['json', 'compact'], default='json')
+    parser.add_argument('--database-url', default=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    parser.add_argument('--server', choices=['app', 'serve_async'], default='app',
+                        help="Entry point to start: the threading dev server or the gevent/eventlet one.")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--url', help="Benchmark an already running server instead of starting one.")
+    parser.add_argument('--round-timeout', type=float, default=60)
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args(argv)
+    if args.transport == 'websocket':
+        try:
+            import websocket  # noqa: F401  python-socketio istemcisinin websocket bağımlılığı
+        except ImportError:
+            parser.error('--transport websocket needs the websocket-client package: '
+                         'pip install "python-socketio[client]" (or use --transport auto/polling)')
+
+    result = run(args)
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result['results'], indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Veritabanı ayarlarının etkisini ölçer: varsayılan motor vs db_config.py ayarları.
+
+Uygulamanın iş yükünü taklit eder: bir yazıcı thread cevap tamponunu
+(write-behind) toplu INSERT'lerle boşaltırken birkaç istek thread'i
+kullanıcı kimliğini id ile okur. Her varyant aynı süre çalışır; saniyedeki
+okuma/yazma sayısı ve "database is locked" hataları raporlanır.
+
+    default  Yalnızca URI: SQLite'ta rollback journal, her okuma ORM Session.get,
+             INSERT ifadesi her toplu yazmada yeniden kurulur
+    tuned    engine_options + configure_engine (WAL, busy_timeout), önceden
+             kurulmuş ifadeler (USER_IDENTITY_BY_ID, answer_insert_statement)
+
+Örnekler:
+
+    python db_benchmark.py
+    python db_benchmark.py --readers 16 --seconds 10 --output db_benchmark.json
+    python db_benchmark.py --database-url postgresql://quiz@localhost/quiz_bench
+
+Dikkat: --database-url ile verilen veritabanındaki tablolar silinip yeniden
+oluşturulur; yalnızca deneme veritabanı kullanın.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from db_config import configure_engine, engine_options
+
+quiz = None  # app modülü; DATABASE_URL ayarlandıktan sonra main() içinde içe aktarılır
+
+
+def make_engine(url, variant):
+    if variant == 'default':
+        return create_engine(url)
+    engine = create_engine(url, **engine_options(url))
+    configure_engine(engine)
+    return engine
+
+
+def prepare(url, users):
+    engine = create_engine(url)
+    quiz.db.metadata.drop_all(engine)
+    quiz.db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(quiz.User), [{'facebook_id': f'bench:{i}', 'name': f'Player {i}'}
+                                         for i in range(1, users + 1)])
+    engine.dispose()
+
+
+def run_variant(url, variant, args):
+    prepare(url, args.users)
+    engine = make_engine(url, variant)
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    rounds = iter(range(10 ** 9))
+
+    def add(key, amount=1):
+        with lock:
+            counts[key] += amount
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            user_id = rng.randint(1, args.users)
+            try:
+                if variant == 'default':
+                    # Her istek kendi Session'ını açar (Flask-SQLAlchemy gibi)
+                    with Session(engine) as session:
+                        session.get(quiz.User, user_id)
+                else:
+                    with engine.connect() as conn:
+                        conn.execute(quiz.USER_IDENTITY_BY_ID, {'user_id': user_id}).first()
+                add('reads')
+            except OperationalError:
+                add('locked')
+
+    def writer():
+        rng = random.Random(0)
+        tuned_stmt = None
+        while not stop.is_set():
+            round_id = f"bench:{next(rounds)}"
+            rows = [{'user_id': user_id, 'question_id': 1, 'round_id': round_id, 'answer': 'x',
+                     'is_correct': rng.random() < 0.3, 'room': 'main'}
+                    for user_id in rng.sample(range(1, args.users + 1), args.batch)]
+            try:
+                if variant == 'default':
+                    stmt = (sqlite_insert(quiz.Answer).on_conflict_do_nothing(index_elements=['user_id', 'round_id'])
+                            if engine.dialect.name == 'sqlite' else insert(quiz.Answer))
+                else:
+                    if tuned_stmt is None:
+                        with quiz.app.app_context():
+                            tuned_stmt = quiz.answer_insert_statement()
+                    stmt = tuned_stmt
+                with engine.begin() as conn:
+                    conn.execute(stmt, rows)
+                add('writes', len(rows))
+            except OperationalError:
+                add('locked')
+            time.sleep(args.write_interval)
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(args.readers)]
+    threads.append(threading.Thread(target=writer, daemon=True))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return {
+        'reads_per_sec': round(counts['reads'] / elapsed, 1),
+        'answer_rows_per_sec': round(counts['writes'] / elapsed, 1),
+        'locked_errors': counts['locked'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare default and tuned database engine settings.")
+    parser.add_argument('--database-url', help="Defaults to a temporary SQLite file.")
+    parser.add_argument('--readers', type=int, default=8, help="Concurrent identity lookup threads.")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=200, help="Answer rows per bulk insert.")
+    parser.add_argument('--write-interval', type=float, default=0.01, help="Pause between bulk inserts (s).")
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--output', help="Write results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    # Her varyant kendi SQLite dosyasını kullanır (journal_mode dosyada kalıcıdır)
+    urls = {variant: args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'db_bench.db')}"
+            for variant in ('default', 'tuned')}
+
+    # app.py hazır ifadeleri bu veritabanının türüne göre kursun
+    global quiz
+    os.environ['DATABASE_URL'] = urls['tuned']
+    import app as quiz
+
+    results = {variant: run_variant(url, variant, args) for variant, url in urls.items()}
+    for variant, result in results.items():
+        print(f"{variant:8} reads/s={result['reads_per_sec']:>9}  answer rows/s={result['answer_rows_per_sec']:>9}"
+              f"  locked={result['locked_errors']}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'database': urls['tuned'].split('://')[0], 'params': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
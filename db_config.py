@@ -0,0 +1,70 @@
+"""Veritabanı motoru (engine) ayarları.
+
+Bağlantı havuzu boyutları ortam değişkenlerinden okunur; worker/thread
+sayısına göre ayarlanmalıdır (ör. gunicorn'da worker başına thread sayısı +
+arka plan thread'leri). SQLite dosyalarında WAL ve busy_timeout açılır:
+zamanlayıcı, cevap yazıcısı ve istek thread'leri okurken/yazarken dosya
+kilidinde sıraya girmez.
+
+    DB_POOL_SIZE        Havuzdaki kalıcı bağlantı sayısı (varsayılan 10)
+    DB_MAX_OVERFLOW     Havuz dolunca açılabilecek ek bağlantı (varsayılan 10)
+    DB_POOL_TIMEOUT     Boş bağlantı bekleme süresi, saniye (varsayılan 10)
+    DB_POOL_RECYCLE     Bağlantıyı yenileme yaşı, saniye (varsayılan 1800)
+    DB_POOL_PRE_PING    Kullanmadan önce bağlantıyı yokla (varsayılan 1)
+    SQLITE_JOURNAL_MODE WAL / DELETE ... (varsayılan WAL)
+    SQLITE_BUSY_TIMEOUT Kilit bekleme süresi, milisaniye (varsayılan 5000)
+    SQLITE_SYNCHRONOUS  WAL ile NORMAL yeterlidir (varsayılan NORMAL)
+"""
+import os
+
+from sqlalchemy import event
+
+
+def _is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+
+def _is_memory_sqlite(uri):
+    return _is_sqlite(uri) and (uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri)
+
+
+def engine_options(uri, env=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS için sözlük döndürür."""
+    if _is_memory_sqlite(uri):
+        return {}  # Flask-SQLAlchemy bellek içi SQLite için StaticPool kullanır
+    options = {
+        'pool_size': int(env.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(env.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(env.get('DB_POOL_TIMEOUT', 10)),
+        'pool_pre_ping': env.get('DB_POOL_PRE_PING', '1') == '1',
+    }
+    if _is_sqlite(uri):
+        # Sürücü seviyesinde de kilit bekleme süresi (saniye)
+        options['connect_args'] = {'timeout': int(env.get('SQLITE_BUSY_TIMEOUT', 5000)) / 1000}
+    else:
+        options['pool_recycle'] = int(env.get('DB_POOL_RECYCLE', 1800))
+    return options
+
+
+def sqlite_pragmas(env=os.environ):
+    return {
+        'journal_mode': env.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'busy_timeout': int(env.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'synchronous': env.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    }
+
+
+def configure_engine(engine, env=os.environ):
+    """SQLite motorlarında her yeni bağlantıya PRAGMA'ları uygular; diğer motorlara dokunmaz."""
+    if engine.dialect.name != 'sqlite' or _is_memory_sqlite(str(engine.url)):
+        return
+    pragmas = sqlite_pragmas(env)
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,166 @@
+"""Yalnızca eklenen (append-only) oyun olayı günlüğü.
+
+Olaylar (tur başlangıcı, cevaplar, doğru cevap açıklaması) JSON Lines olarak
+`events-00000001.jsonl`, `events-00000002.jsonl` ... segmentlerine yazılır;
+segment `segment_bytes` boyutunu geçince yenisine geçilir. Yazma sıcak yolda
+değil, WriteBehindBuffer'ın arka plan thread'inde toplu yapılır (bkz. app.py).
+
+Günlük iki amaçla okunur: başlangıçta yeniden oynatma (kaybolan cevapları
+veritabanına yazmak, açık turu geri yüklemek) ve `flask events-report` ile
+akış halinde analiz. Okuyucu satır satır ilerler; çökme sonrası yarım kalmış
+son satır atlanır.
+
+`source` (ör. veritabanı kimliği) verilirse her segment bununla damgalanır
+(ilk satır `{"type": "segment", "source": ...}`); yeniden oynatma yalnızca
+aynı kaynağın segmentlerini okur, böylece başka bir veritabanına ait cevaplar
+yanlış veritabanına yazılmaz.
+"""
+import bisect
+import fcntl
+import glob
+import json
+import os
+import re
+import time
+
+SEGMENT_PATTERN = re.compile(r'^events-(\d{8})\.jsonl$')
+# Cevap süresi histogramı sınırları (milisaniye)
+ELAPSED_BUCKETS_MS = (500, 1000, 2000, 3000, 5000, 7500, 10000, 15000, 20000, 30000)
+
+
+def segment_paths(directory):
+    """Segment dosyalarını sıra numarasına göre döndürür."""
+    paths = [path for path in glob.glob(os.path.join(directory, 'events-*.jsonl'))
+             if SEGMENT_PATTERN.match(os.path.basename(path))]
+    return sorted(paths)
+
+
+class SegmentedEventLog:
+    """Olay listesini (dict) son segmentin sonuna ekler, gerekirse yeni segment açar.
+
+    Her toplu yazma dosyayı açıp flock ile kilitler; liderlik el değiştirirken
+    iki süreç aynı anda yazsa bile satırlar karışmaz.
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, fsync=False, source=None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.source = source
+        self._checked_segment = None  # Kaynağı bu günlükle eşleştiği doğrulanmış son segment
+
+    def _current_segment(self):
+        paths = segment_paths(self.directory)
+        if paths and os.path.getsize(paths[-1]) < self.segment_bytes:
+            if paths[-1] == self._checked_segment or segment_source(paths[-1]) == self.source:
+                self._checked_segment = paths[-1]
+                return paths[-1]
+        number = int(SEGMENT_PATTERN.match(os.path.basename(paths[-1])).group(1)) + 1 if paths else 1
+        return os.path.join(self.directory, f'events-{number:08d}.jsonl')
+
+    def write(self, events):
+        """WriteBehindBuffer'ın flush_fn'i olarak kullanılır."""
+        os.makedirs(self.directory, exist_ok=True)
+        data = ''.join(json.dumps(event, separators=(',', ':'), ensure_ascii=False) + '\n'
+                       for event in events).encode('utf-8')
+        with open(self._current_segment(), 'ab') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if self.source is not None and os.fstat(f.fileno()).st_size == 0:
+                    header = {'type': 'segment', 'source': self.source, 'ts': time.time()}
+                    data = json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n' + data
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def segment_source(path):
+    """Segmentin damgalandığı kaynak; damgasız (eski) segment için None."""
+    with open(path, 'rb') as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return None
+    return header.get('source') if isinstance(header, dict) and header.get('type') == 'segment' else None
+
+
+def iter_events(directory, since=None, source=None):
+    """Olayları yazıldıkları sırayla tek tek üretir.
+
+    `since` (time.time()) verilirse o andan önce son kez değişmiş segmentler
+    hiç açılmaz ve daha eski olaylar atlanır. `source` verilirse yalnızca o
+    kaynakla damgalanmış segmentler okunur.
+    """
+    for path in segment_paths(directory):
+        if since is not None and os.path.getmtime(path) < since:
+            continue
+        if source is not None and segment_source(path) != source:
+            continue
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # Çökme sırasında yarım kalmış satır
+                if event.get('type') == 'segment':
+                    continue
+                if since is not None and event.get('ts', 0) < since:
+                    continue
+                yield event
+
+
+class QuestionStats:
+    """Tek bir sorunun cevap sayısı, doğruluk oranı ve cevap süresi histogramı."""
+    __slots__ = ('answers', 'correct', 'elapsed_total', 'buckets')
+
+    def __init__(self):
+        self.answers = 0
+        self.correct = 0
+        self.elapsed_total = 0
+        self.buckets = [0] * (len(ELAPSED_BUCKETS_MS) + 1)
+
+    def add(self, correct, elapsed_ms):
+        self.answers += 1
+        self.correct += bool(correct)
+        if elapsed_ms is not None:
+            self.elapsed_total += elapsed_ms
+            self.buckets[bisect.bisect_left(ELAPSED_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile_ms(self, q):
+        """Histogramdan yaklaşık yüzdelik (kovanın üst sınırı)."""
+        timed = sum(self.buckets)
+        if not timed:
+            return None
+        target, seen = q * timed, 0
+        for bound, count in zip(ELAPSED_BUCKETS_MS + (None,), self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def to_dict(self):
+        timed = sum(self.buckets)
+        return {'answers': self.answers,
+                'accuracy': round(self.correct / self.answers, 4) if self.answers else None,
+                'mean_ms': round(self.elapsed_total / timed) if timed else None,
+                'p50_ms': self.percentile_ms(0.5),
+                'p90_ms': self.percentile_ms(0.9),
+                'histogram': dict(zip([f'<={b}' for b in ELAPSED_BUCKETS_MS] + ['>30000'], self.buckets))}
+
+
+def summarize_answers(events, room=None):
+    """Cevap olaylarını soru başına toplar (bellek kullanımı soru sayısıyla sınırlı)."""
+    per_question = {}
+    overall = QuestionStats()
+    for event in events:
+        if event.get('type') != 'score' or (room and event.get('room') != room):
+            continue
+        stats = per_question.get(event.get('question_id'))
+        if stats is None:
+            stats = per_question[event.get('question_id')] = QuestionStats()
+        stats.add(event.get('correct'), event.get('elapsed_ms'))
+        overall.add(event.get('correct'), event.get('elapsed_ms'))
+    return per_question, overall
@@ -0,0 +1,189 @@
+"""Facebook Graph API OAuth istemcisi.
+
+Her girişte iki ayrı `requests.get` (yeni TLS bağlantısı, zaman aşımı yok)
+yapmak yerine tek bir `requests.Session` üzerinden kalıcı bağlantı havuzu
+kullanılır. Her istek bağlantı/okuma zaman aşımıyla sınırlıdır; bağlantı
+hataları ve geçici 5xx yanıtları kısa bir geri çekilme (backoff) ile yeniden
+denenir. Yavaş bir Graph API böylece worker thread'lerini süresiz tutamaz.
+
+`graph_url` değiştirilerek istemci yerel bir sahte (stub) Graph sunucusuna
+yönlendirilebilir (ör. `FACEBOOK_GRAPH_URL=http://127.0.0.1:8081`, bkz.
+graph_stub.py). Async sunucular/scriptler için httpx tabanlı
+`AsyncFacebookOAuthClient` aynı arayüzü sunar (httpx opsiyonel bağımlılıktır).
+`python graph_stub.py --check` her iki istemcinin yeniden deneme kurallarını
+doğrular.
+"""
+import asyncio
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_GRAPH_URL = 'https://graph.facebook.com'
+RETRY_STATUSES = (502, 503, 504)  # Graph API'nin geçici hata kodları
+
+
+class FacebookOAuthError(Exception):
+    """Giriş akışı başarısız oldu; `user_message` kullanıcıya gösterilebilir."""
+
+    def __init__(self, message, user_message):
+        super().__init__(message)
+        self.user_message = user_message
+
+
+def _error_message(data):
+    error = data.get('error') if isinstance(data, dict) else None
+    return error.get('message', 'Unknown error') if isinstance(error, dict) else 'Unknown error'
+
+
+def _check_profile(user_data):
+    if not isinstance(user_data, dict) or not user_data.get('id') or not user_data.get('name'):
+        raise FacebookOAuthError(f"Facebook response missing ID or Name: {user_data}",
+                                 "Could not retrieve necessary user information from Facebook.")
+    return user_data
+
+
+class FacebookOAuthClient:
+    """Yetkilendirme kodunu erişim anahtarına çevirir ve kullanıcı profilini getirir.
+
+    Thread-safe'tir; uygulama başına bir tane oluşturulup paylaşılmalıdır.
+    Kod değişimi (code exchange) yalnızca bağlantı kurulamadıysa veya sunucu
+    geçici 5xx döndürdüyse yeniden denenir: okuma zaman aşımında kod
+    Facebook tarafında kullanılmış olabilir, tekrar göndermek işe yaramaz.
+    """
+
+    def __init__(self, app_id, app_secret, redirect_uri, api_version='v18.0', graph_url=DEFAULT_GRAPH_URL,
+                 connect_timeout=2.0, read_timeout=5.0, retries=2, backoff=0.3, pool_size=20):
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.redirect_uri = redirect_uri
+        self.base_url = f"{graph_url.rstrip('/')}/{api_version}"
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(total=retries, connect=retries, read=0, status=retries, backoff_factor=backoff,
+                      status_forcelist=RETRY_STATUSES, allowed_methods=frozenset({'GET'}),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+    def close(self):
+        self._session.close()
+
+    def _get_json(self, path, params, what):
+        url = f"{self.base_url}/{path}"
+        try:
+            response = self._session.get(url, params=params, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise FacebookOAuthError(f"Error requesting {what}: {e}",
+                                     f"Could not connect to Facebook to get {what}.") from e
+        try:
+            data = response.json()
+        except ValueError:
+            raise FacebookOAuthError(f"Failed to decode JSON from {what} response "
+                                     f"(HTTP {response.status_code}): {response.text[:500]}",
+                                     f"Received invalid response from Facebook for {what}.")
+        if not response.ok:
+            raise FacebookOAuthError(f"Facebook returned HTTP {response.status_code} for {what}: {data}",
+                                     f"Failed to get {what} from Facebook: {_error_message(data)}")
+        return data
+
+    def exchange_code(self, code):
+        """Yetkilendirme kodunu erişim anahtarına çevirir."""
+        token_data = self._get_json('oauth/access_token', {
+            'client_id': self.app_id,
+            'redirect_uri': self.redirect_uri,
+            'client_secret': self.app_secret,
+            'code': code,
+        }, 'access token')
+        access_token = token_data.get('access_token')
+        if not access_token:
+            raise FacebookOAuthError(f"Facebook did not return access token. Error: {token_data.get('error', {})}",
+                                     f"Failed to get access token from Facebook: {_error_message(token_data)}")
+        return access_token
+
+    def fetch_profile(self, access_token, fields='id,name,picture'):
+        """Kullanıcının profilini ({'id', 'name', ...}) döndürür."""
+        user_data = self._get_json('me', {'fields': fields, 'access_token': access_token}, 'user profile')
+        return _check_profile(user_data)
+
+    def login(self, code):
+        """Kod değişimi + profil isteği; profil sözlüğünü döndürür."""
+        return self.fetch_profile(self.exchange_code(code))
+
+
+class AsyncFacebookOAuthClient:
+    """FacebookOAuthClient'ın httpx.AsyncClient ile çalışan async karşılığı.
+
+    Aynı zaman aşımı ve yeniden deneme kurallarını uygular (okuma zaman
+    aşımları yeniden denenmez). httpx kurulu olmalıdır: `pip install httpx`.
+    """
+
+    def __init__(self, app_id, app_secret, redirect_uri, api_version='v18.0', graph_url=DEFAULT_GRAPH_URL,
+                 connect_timeout=2.0, read_timeout=5.0, retries=2, backoff=0.3, pool_size=20):
+        import httpx  # Opsiyonel bağımlılık: yalnızca async istemci kullanılırsa gerekir
+        self._httpx = httpx
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.redirect_uri = redirect_uri
+        self.base_url = f"{graph_url.rstrip('/')}/{api_version}"
+        self.retries = retries
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def _get_json(self, path, params, what):
+        url = f"{self.base_url}/{path}"
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._client.get(url, params=params)
+            except self._httpx.ConnectError as e:
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff * (2 ** attempt))
+                    continue
+                raise FacebookOAuthError(f"Error requesting {what}: {e}",
+                                         f"Could not connect to Facebook to get {what}.") from e
+            except self._httpx.HTTPError as e:
+                raise FacebookOAuthError(f"Error requesting {what}: {e}",
+                                         f"Could not connect to Facebook to get {what}.") from e
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                logging.warning(f"Facebook returned HTTP {response.status_code} for {what}, retrying.")
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+                continue
+            break
+        try:
+            data = response.json()
+        except ValueError:
+            raise FacebookOAuthError(f"Failed to decode JSON from {what} response "
+                                     f"(HTTP {response.status_code}): {response.text[:500]}",
+                                     f"Received invalid response from Facebook for {what}.")
+        if response.is_error:
+            raise FacebookOAuthError(f"Facebook returned HTTP {response.status_code} for {what}: {data}",
+                                     f"Failed to get {what} from Facebook: {_error_message(data)}")
+        return data
+
+    async def exchange_code(self, code):
+        token_data = await self._get_json('oauth/access_token', {
+            'client_id': self.app_id,
+            'redirect_uri': self.redirect_uri,
+            'client_secret': self.app_secret,
+            'code': code,
+        }, 'access token')
+        access_token = token_data.get('access_token')
+        if not access_token:
+            raise FacebookOAuthError(f"Facebook did not return access token. Error: {token_data.get('error', {})}",
+                                     f"Failed to get access token from Facebook: {_error_message(token_data)}")
+        return access_token
+
+    async def fetch_profile(self, access_token, fields='id,name,picture'):
+        user_data = await self._get_json('me', {'fields': fields, 'access_token': access_token}, 'user profile')
+        return _check_profile(user_data)
+
+    async def login(self, code):
+        return await self.fetch_profile(await self.exchange_code(code))
@@ -0,0 +1,362 @@
+"""Çoklu worker / çoklu sunucu için olay dağıtımı ve lider seçimi.
+
+Quiz saatini yalnızca seçilmiş tek bir süreç (lider) çalıştırır; tur durumunu
+bir mesaj kuyruğu (broker) üzerinden yayınlar. Her worker broker'a abone olur,
+kendi yerel durumunu günceller ve olayı kendi bağlı istemcilerine iletir.
+
+Broker URL'leri:
+    local://                   Tek süreç (varsayılan, test için)
+    unix:///tmp/cafe_quiz.sock Aynı makinedeki worker'lar (ilk bağlanan hub olur)
+    redis://host:6379/0        Birden fazla makine (opsiyonel 'redis' paketi gerekir)
+"""
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import deque
+
+
+class Broker:
+    """Yayınlanan her mesajı (dict) tüm süreçlerdeki tüm abonelere iletir."""
+
+    def __init__(self):
+        self._callbacks = []
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+    def _dispatch(self, message):
+        for callback in self._callbacks:
+            try:
+                callback(message)
+            except Exception:
+                logging.exception(f"Broker: Subscriber failed for message type {message.get('type')}:")
+
+    def publish(self, message):
+        raise NotImplementedError
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class LocalBroker(Broker):
+    """Süreç içi broker: mesajı aynı süreçteki abonelere hemen iletir."""
+
+    def publish(self, message):
+        self._dispatch(message)
+
+
+class _UnixSocketHub:
+    """Unix soket üzerinden gelen her satırı bağlı tüm istemcilere aktarır."""
+
+    def __init__(self, path, lock_fd):
+        self.path = path
+        self._lock_fd = lock_fd  # Açık kaldığı sürece bu süreç hub'dır
+        self._clients = set()
+        self._clients_lock = threading.Lock()
+        if os.path.exists(path):
+            os.unlink(path)  # Ölmüş bir hub'dan kalan soket dosyası
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen(128)
+        threading.Thread(target=self._accept_loop, daemon=True, name='broker-hub').start()
+        logging.info(f"Broker: Hosting unix socket hub at {path}.")
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with self._clients_lock:
+                self._clients.add(conn)
+            threading.Thread(target=self._relay_loop, args=(conn,), daemon=True).start()
+
+    def _relay_loop(self, conn):
+        try:
+            for line in conn.makefile('rb'):
+                with self._clients_lock:
+                    clients = list(self._clients)
+                for client in clients:
+                    try:
+                        client.sendall(line)
+                    except OSError:
+                        self._drop(client)
+        except OSError:
+            pass
+        self._drop(conn)
+
+    def _drop(self, conn):
+        with self._clients_lock:
+            self._clients.discard(conn)
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+
+class UnixSocketBroker(Broker):
+    """Aynı makinedeki worker'lar arasında unix soket üzerinden dağıtım.
+
+    Her süreç hub'a istemci olarak bağlanır; hub yoksa kilidi alan süreç hub'ı
+    kendisi açar. Bağlantı yokken yayınlanan mesajlar sınırlı bir kuyrukta
+    bekletilir ve yeniden bağlanınca gönderilir.
+    """
+
+    def __init__(self, path, max_pending=10000):
+        super().__init__()
+        self.path = path
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._pending = deque(maxlen=max_pending)
+        self._hub = None
+        self._closed = threading.Event()
+        self._thread = None
+
+    def publish(self, message):
+        data = json.dumps(message, separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._send_lock:
+            if self._sock is None:
+                self._pending.append(data)
+                return
+            try:
+                self._sock.sendall(data)
+            except OSError:
+                self._pending.append(data)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._client_loop, daemon=True, name='broker-client')
+            self._thread.start()
+
+    def close(self):
+        self._closed.set()
+        with self._send_lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def _try_become_hub(self):
+        lock_fd = os.open(self.path + '.lock', os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(lock_fd)
+            return False
+        self._hub = _UnixSocketHub(self.path, lock_fd)
+        return True
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+            return sock
+        except OSError:
+            sock.close()
+            return None
+
+    def _client_loop(self):
+        while not self._closed.is_set():
+            sock = self._connect()
+            if sock is None and self._hub is None and self._try_become_hub():
+                sock = self._connect()
+            if sock is None:
+                self._closed.wait(0.5)
+                continue
+
+            try:
+                with self._send_lock:
+                    self._sock = sock
+                    # Mesaj ancak gönderildikten sonra kuyruktan çıkar; hub bu arada ölürse kaybolmaz
+                    while self._pending:
+                        sock.sendall(self._pending[0])
+                        self._pending.popleft()
+                for line in sock.makefile('rb'):
+                    self._dispatch(json.loads(line))
+            except (OSError, ValueError):
+                logging.exception("Broker: Lost connection to unix socket hub:")
+            with self._send_lock:
+                self._sock = None
+            sock.close()
+            if not self._closed.is_set():
+                logging.warning("Broker: Disconnected from hub, reconnecting.")
+
+
+class RedisBroker(Broker):
+    """Redis pub/sub ile birden fazla makine arasında dağıtım (opsiyonel)."""
+
+    def __init__(self, url, channel='cafe_quiz:events'):
+        super().__init__()
+        import redis  # Opsiyonel bağımlılık: yalnızca redis:// kullanılırsa gerekir
+        self._redis = redis.Redis.from_url(url)
+        self.channel = channel
+        self._pubsub_thread = None
+
+    def publish(self, message):
+        self._redis.publish(self.channel, json.dumps(message, separators=(',', ':')))
+
+    def start(self):
+        if self._pubsub_thread is None:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: lambda raw: self._dispatch(json.loads(raw['data']))})
+            self._pubsub_thread = pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def close(self):
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+
+
+def create_broker(url):
+    """URL şemasına göre broker oluşturur; boş URL süreç içi broker demektir."""
+    if not url or url.startswith('local://'):
+        return LocalBroker()
+    if url.startswith('unix://'):
+        return UnixSocketBroker(url[len('unix://'):])
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported broker URL: {url}")
+
+
+# --- Lider Seçimi ---
+class StandaloneElection:
+    """Tek süreçli çalışma: bu süreç her zaman liderdir."""
+
+    renew_interval = None  # Yenilenecek bir kira yok
+
+    def try_acquire(self):
+        return True
+
+    def renew(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class FileLockElection:
+    """Aynı makinedeki süreçler arasında flock ile lider seçimi.
+
+    Kilit dosya tanımlayıcısı açık kaldığı sürece tutulur; lider süreç ölürse
+    işletim sistemi kilidi bırakır ve bekleyen başka bir worker lider olur.
+    """
+
+    renew_interval = None  # Kilit süresiz; süreç yaşadıkça tutulur
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def try_acquire(self):
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def renew(self):
+        return self._fd is not None
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+# Anahtar hâlâ bu sürecin jetonunu taşıyorsa süreyi uzatır / siler (karşılaştırma ve işlem atomik)
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisElection:
+    """Birden fazla makine arasında süreli Redis anahtarı ile lider seçimi.
+
+    Lider, anahtarı `renew_interval` (ttl / 3) aralıklarla yeniler; bu iş faz
+    geçişlerinden bağımsız bir heartbeat thread'inde yapılmalıdır (bkz.
+    start_heartbeat), aksi halde ttl'den uzun bir faz sırasında kira düşer.
+    """
+
+    def __init__(self, url, key='cafe_quiz:leader', ttl=10):
+        import redis  # Opsiyonel bağımlılık
+        self._redis = redis.Redis.from_url(url)
+        self.key = key
+        self.ttl_ms = int(ttl * 1000)
+        self.renew_interval = ttl / 3
+        self._token = uuid.uuid4().hex
+        self._renew = self._redis.register_script(_RENEW_SCRIPT)
+        self._release = self._redis.register_script(_RELEASE_SCRIPT)
+
+    def try_acquire(self):
+        if self._redis.set(self.key, self._token, nx=True, px=self.ttl_ms):
+            return True
+        return self.renew()
+
+    def renew(self):
+        return bool(self._renew(keys=[self.key], args=[self._token, self.ttl_ms]))
+
+    def release(self):
+        self._release(keys=[self.key], args=[self._token])
+
+
+def create_election(broker_url, lock_path, ttl=10):
+    """Broker türüne uygun lider seçimi: süreç içi → tek lider, unix → flock, redis → Redis anahtarı."""
+    if not broker_url or broker_url.startswith('local://'):
+        return StandaloneElection()
+    if broker_url.startswith(('redis://', 'rediss://')):
+        return RedisElection(broker_url, ttl=ttl)
+    return FileLockElection(lock_path)
+
+
+def wait_for_leadership(election, stop_event, retry_interval=2.0):
+    """Lider olana veya `stop_event` set edilene kadar bekler; lider olunduysa True."""
+    while not stop_event.is_set():
+        if election.try_acquire():
+            return True
+        stop_event.wait(retry_interval)
+    return False
+
+
+def start_heartbeat(election, on_lost):
+    """Liderlik kirasını `election.renew_interval` aralıklarla ayrı bir thread'de yeniler.
+
+    Yenileme başarısız olursa (anahtar başkasına geçti veya Redis'e ulaşılamadı)
+    `on_lost()` çağrılır ve thread biter. Durdurmak için dönen Event set edilir.
+    """
+    stopped = threading.Event()
+    if not election.renew_interval:
+        return stopped
+
+    def run():
+        while not stopped.wait(election.renew_interval):
+            try:
+                renewed = election.renew()
+            except Exception:
+                logging.exception("Election: Failed to renew leadership.")
+                renewed = False
+            if not renewed:
+                if not stopped.is_set():
+                    on_lost()
+                return
+
+    threading.Thread(target=run, daemon=True, name='leader-heartbeat').start()
+    return stopped
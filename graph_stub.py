@@ -0,0 +1,148 @@
+"""Yerel sahte (stub) Facebook Graph API sunucusu.
+
+Facebook girişini gerçek bir uygulama veya internet bağlantısı olmadan
+denemek için; istemci FACEBOOK_GRAPH_URL ile buraya yönlendirilir:
+
+    python graph_stub.py --port 8081
+    FACEBOOK_GRAPH_URL=http://127.0.0.1:8081 FACEBOOK_APP_ID=stub FACEBOOK_APP_SECRET=stub python app.py
+    # ardından tarayıcıda: /facebook/callback?code=ok
+
+Davranış, kod değişimine gönderilen `code` ile seçilir:
+
+    flaky      ilk istek 503, sonraki başarılı (yeniden deneme)
+    slow       okuma zaman aşımından uzun bekler (yeniden denenmemeli)
+    badjson    200 ile JSON olmayan gövde
+    diğerleri  geçerli erişim anahtarı; /me sahte bir profil döndürür
+
+`--check` facebook_oauth istemcilerini (sync ve httpx kuruluysa async) bu
+senaryolara karşı çalıştırır.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SLOW_SECONDS = 2.0
+
+
+class GraphStubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass  # İstek başına log basma
+
+    def _send(self, status, body, content_type='application/json'):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        if url.path.endswith('/oauth/access_token'):
+            code = params.get('code', '')
+            self.server.hits[code] += 1
+            if code == 'flaky' and self.server.hits[code] == 1:
+                self._send(503, {'error': {'message': 'Service temporarily unavailable'}})
+            elif code == 'slow':
+                time.sleep(SLOW_SECONDS)
+                self._send(200, {'access_token': 'token-slow'})
+            elif code == 'badjson':
+                self._send(200, b'<html>Bad gateway</html>', 'text/html')
+            else:
+                self._send(200, {'access_token': f'token-{code}', 'token_type': 'bearer'})
+        elif url.path.endswith('/me'):
+            token = params.get('access_token', '')
+            if not token.startswith('token-'):
+                self._send(400, {'error': {'message': 'Invalid OAuth access token.'}})
+            else:
+                self._send(200, {'id': f'stub-{token[6:]}', 'name': f'Stub User {token[6:]}'})
+        else:
+            self._send(404, {'error': {'message': 'Unknown path'}})
+
+
+def start_stub(port=0):
+    """Sunucuyu arka plan thread'inde başlatır; (sunucu, taban URL) döndürür."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), GraphStubHandler)
+    server.daemon_threads = True
+    server.hits = Counter()  # code -> kod değişimi isteği sayısı
+    threading.Thread(target=server.serve_forever, daemon=True, name='graph-stub').start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def check():
+    """Yeniden deneme ve hata kurallarını stub'a karşı doğrular; başarısız kontrol sayısını döndürür.
+
+    httpx kuruluysa AsyncFacebookOAuthClient da aynı senaryolarla denenir.
+    """
+    from facebook_oauth import AsyncFacebookOAuthClient, FacebookOAuthClient, FacebookOAuthError
+
+    server, graph_url = start_stub()
+    options = dict(graph_url=graph_url, read_timeout=SLOW_SECONDS / 4, backoff=0)
+
+    def scenarios(login):
+        def login_error(code):
+            try:
+                login(code)
+            except FacebookOAuthError as e:
+                return e.user_message
+            return None
+
+        server.hits.clear()
+        return [
+            ("login succeeds", login('ok')['id'] == 'stub-ok'),
+            ("503 is retried", login('flaky')['id'] == 'stub-flaky' and server.hits['flaky'] == 2),
+            ("read timeout is not retried", login_error('slow') is not None and server.hits['slow'] == 1),
+            ("invalid JSON is reported", 'invalid response' in (login_error('badjson') or '')),
+        ]
+
+    client = FacebookOAuthClient('stub', 'stub', 'http://127.0.0.1/facebook/callback', **options)
+    results = [(f"sync: {name}", ok) for name, ok in scenarios(client.login)]
+    client.close()
+
+    try:
+        import httpx  # noqa: F401  Async istemcinin opsiyonel bağımlılığı
+    except ImportError:
+        print("skip async client (httpx is not installed)")
+    else:
+        def async_login(code):
+            async def login():
+                async_client = AsyncFacebookOAuthClient('stub', 'stub', 'http://127.0.0.1/facebook/callback',
+                                                        **options)
+                try:
+                    return await async_client.login(code)
+                finally:
+                    await async_client.aclose()
+            return asyncio.run(login())
+
+        results += [(f"async: {name}", ok) for name, ok in scenarios(async_login)]
+
+    server.shutdown()
+    for name, ok in results:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    return sum(not ok for _, ok in results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stub of the Facebook Graph API.")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--check', action='store_true', help="Run the OAuth clients against the stub and exit.")
+    args = parser.parse_args(argv)
+    if args.check:
+        sys.exit(1 if check() else 0)
+    server, graph_url = start_stub(args.port)
+    print(f"Graph API stub listening on {graph_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Gunicorn yapılandırması.
+
+Birden fazla worker ile çalıştırmak için worker'ların ortak bir broker
+kullanması gerekir; aksi halde her worker kendi saatini çalıştırır:
+
+    QUIZ_BROKER_URL=unix:///tmp/cafe_quiz.sock \\
+        gunicorn -c gunicorn.conf.py -w 4 --threads 100
+
+Uygulama `wsgi:create_app()` fabrikasından yüklenir (komut satırında
+`app:app` verilirse o kullanılır, şema kontrolü yapılmaz). GUNICORN_PRELOAD=1
+(varsayılan) iken uygulama master süreçte bir kez yüklenir; worker'lar fork
+ile açılır ve yeniden başlatmalarda import süresi ödenmez.
+
+Saati tek bir lider worker çalıştırır, diğerleri olayları kendi istemcilerine
+iletir. Socket.IO long-polling kullandığı için yük dengeleyicide yapışkan
+oturum (sticky session) açık olmalıdır.
+"""
+import os
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+wsgi_app = 'wsgi:create_app()'
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def post_fork(server, worker):
+    # Ön yüklemede master'ın açtığı veritabanı bağlantıları worker'lar arasında paylaşılmasın
+    quiz = sys.modules.get('app')
+    if quiz is not None:
+        with quiz.app.app_context():
+            quiz.db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # Her worker kendi broker aboneliğini ve cevap yazıcısını başlatır (yavaş kısmı arka planda)
+    from app import start_quiz_timer
+    start_quiz_timer()
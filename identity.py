@@ -0,0 +1,64 @@
+"""Kullanıcı kimliği önbelleği.
+
+Her HTTP isteğinde ve her Socket.IO olayında `User.query.get(user_id)` yapmak
+yerine, neredeyse hiç değişmeyen kimlik bilgisi (id, isim) burada tutulur.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class UserIdentity(NamedTuple):
+    """Şablonlarda ve handler'larda User yerine kullanılabilen hafif kimlik."""
+    id: int
+    name: str
+    facebook_id: str
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.name, user.facebook_id)
+
+
+class IdentityCache:
+    """user_id → UserIdentity; boyutu sınırlı (LRU) ve kayıtlar TTL sonunda düşer."""
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (identity, eklenme zamanı)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            identity, stored_at = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return identity
+
+    def put(self, identity):
+        with self._lock:
+            self._entries[identity.id] = (identity, time.monotonic())
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def get_or_load(self, user_id, loader):
+        """Önbellekte yoksa `loader(user_id)` ile User yükler; kullanıcı yoksa None."""
+        identity = self.get(user_id)
+        if identity is None:
+            user = loader(user_id)
+            if user is None:
+                return None
+            identity = UserIdentity.from_user(user)
+            self.put(identity)
+        return identity
@@ -0,0 +1,158 @@
+"""Canlı skor tablosu: puanlar bellekte sıralı tutulur.
+
+Sıralama, genişlik (width) bilgisi tutan bir skip list ile yapılır; böylece
+puan güncellemesi, ilk N listesi ve bir kullanıcının sırası O(log n) olur ve
+her turda tüm cevaplar tablosu üzerinden ORDER BY SUM(...) çalıştırmak gerekmez.
+"""
+import random
+import threading
+
+_MAX_LEVEL = 20  # ~1M kullanıcıya kadar O(log n) kalır
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        # width[i]: bu düğümden next[i]'ye kaç adım olduğu (next[i] None ise anlamsız)
+        self.width = [1] * level
+
+
+class IndexableSkipList:
+    """Sıralı anahtarlar için ekleme/silme/sıra/indeks işlemleri O(log n)."""
+
+    def __init__(self, max_level=_MAX_LEVEL):
+        self._max_level = max_level
+        self._head = _Node(None, max_level)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _find(self, key):
+        """Her seviyede `key`'den küçük son düğümü ve o düğümün konumunu bulur."""
+        update = [None] * self._max_level
+        steps = [0] * self._max_level
+        node, pos = self._head, 0
+        for level in reversed(range(self._max_level)):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                pos += node.width[level]
+                node, nxt = nxt, nxt.next[level]
+            update[level] = node
+            steps[level] = pos
+        return update, steps
+
+    def insert(self, key):
+        update, steps = self._find(key)
+        height = 1
+        while height < self._max_level and random.random() < 0.5:
+            height += 1
+        new = _Node(key, height)
+        new_pos = steps[0] + 1
+        for level in range(height):
+            prev = update[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - (new_pos - steps[level]) + 1
+            prev.width[level] = new_pos - steps[level]
+        for level in range(height, self._max_level):
+            update[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        update, _ = self._find(key)
+        target = update[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(self._max_level):
+            prev = update[level]
+            if prev.next[level] is target:
+                prev.width[level] += target.width[level] - 1
+                prev.next[level] = target.next[level]
+            else:
+                prev.width[level] -= 1
+        self._size -= 1
+
+    def bisect_left(self, key):
+        """`key`'den küçük eleman sayısı."""
+        node, pos = self._head, 0
+        for level in reversed(range(self._max_level)):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                pos += node.width[level]
+                node, nxt = nxt, nxt.next[level]
+        return pos
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    """Kullanıcı puanlarını tutar; ilk N ve kullanıcı sırası ucuzdur.
+
+    Eşit puanlılar aynı sırayı paylaşır (1, 2, 2, 4 ...).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scores = {}
+        self._names = {}
+        self._ranking = IndexableSkipList()  # (-puan, user_id) anahtarları
+
+    def __len__(self):
+        return len(self._scores)
+
+    def load(self, rows):
+        """(user_id, name, score) satırlarıyla tabloyu sıfırdan kurar."""
+        with self._lock:
+            self._scores.clear()
+            self._names.clear()
+            self._ranking = IndexableSkipList()
+            for user_id, name, score in rows:
+                score = int(score or 0)
+                self._scores[user_id] = score
+                self._names[user_id] = name
+                self._ranking.insert((-score, user_id))
+
+    def add(self, user_id, points, name=None):
+        """Kullanıcının puanına `points` ekler ve yeni toplamı döndürür."""
+        with self._lock:
+            if name is not None:
+                self._names[user_id] = name
+            old = self._scores.get(user_id)
+            if old is not None:
+                if not points:
+                    return old
+                self._ranking.remove((-old, user_id))
+            new = (old or 0) + points
+            self._scores[user_id] = new
+            self._ranking.insert((-new, user_id))
+            return new
+
+    def rank(self, user_id):
+        """(sıra, puan) döndürür; tabloda olmayan kullanıcı için None."""
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return None
+            return self._ranking.bisect_left((-score,)) + 1, score
+
+    def top(self, n=10):
+        """İlk `n` kullanıcıyı [sıra, isim, puan] listeleri olarak döndürür."""
+        result = []
+        with self._lock:
+            last_score, last_rank = None, 0
+            for position, (neg_score, user_id) in enumerate(self._ranking, start=1):
+                if position > n:
+                    break
+                score = -neg_score
+                if score != last_score:
+                    last_score, last_rank = score, position
+                result.append([last_rank, self._names.get(user_id, '?'), score])
+        return result
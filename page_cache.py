@@ -0,0 +1,92 @@
+"""Sayfa iskeleti (shell) önbelleği.
+
+Şablonun kullanıcıdan bağımsız kısmı bir kez render edilip saklanır; her
+istekte yalnızca kullanıcıya özel küçük parçalar (flash mesajları, giriş
+yapan kullanıcı ...) render edilip iskeletin boşluklarına yerleştirilir.
+
+Şablonda parça `{{ fragment('_flash_messages.html') }}` ile işaretlenir;
+anahtar kelime argümanları (ör. stil) parçaya sabit değişken olarak geçer.
+İskelet render edilirken `fragment` bir işaretçi döndürür; önbelleksiz
+render_template ile kullanıldığında parçayı doğrudan render eder.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from jinja2 import pass_context
+from markupsafe import Markup
+
+_MARKER = '\x00fragment:{}\x00'
+_MARKER_PATTERN = re.compile('\x00fragment:(\\d+)\x00')
+
+
+@pass_context
+def render_fragment(context, name, **variables):
+    """`fragment` şablon fonksiyonunun önbelleksiz hali: parçayı aynı bağlamla hemen render eder."""
+    return Markup(context.environment.get_template(name).render(dict(context.get_all(), **variables)))
+
+
+class ShellCache:
+    """(şablon, anahtar) -> iskelet parçaları; en fazla `max_entries` iskelet (LRU).
+
+    `render(name, **context)` iskeleti kuran, Flask'ın render_template'i gibi
+    bir fonksiyondur. Parçalar her istekte doğrudan `environment` üzerinden
+    render edilir; bağlam bir kez `prepare_context(dict)` ile (Flask'ta
+    app.update_template_context) tamamlanır. İskeleti değiştiren her değişken
+    (ör. oda adı) anahtarda bulunmalıdır; anahtarda olmayan değişkenler
+    yalnızca parçalarda kullanılabilir.
+    """
+
+    def __init__(self, render, environment, prepare_context=None, max_entries=256):
+        self._render = render
+        self.environment = environment
+        self._prepare_context = prepare_context
+        self.max_entries = max_entries
+        self._shells = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, template_name, shell_context):
+        fragments = []
+
+        def fragment(name, **variables):
+            fragments.append((name, variables))
+            return Markup(_MARKER.format(len(fragments) - 1))
+
+        html = self._render(template_name, fragment=fragment, **shell_context)
+        # Çift indeksler sabit HTML, tek indeksler (parça şablonu, sabit değişkenler)
+        parts = _MARKER_PATTERN.split(html)
+        return tuple(fragments[int(part)] if index % 2 else part for index, part in enumerate(parts))
+
+    def render(self, template_name, key, shell_context, context):
+        """İskeleti önbellekten alır (yoksa `shell_context` ile kurar), parçaları `context` ile doldurur."""
+        cache_key = (template_name,) + tuple(key)
+        with self._lock:
+            parts = self._shells.get(cache_key)
+            if parts is not None:
+                self._shells.move_to_end(cache_key)
+                self.hits += 1
+        if parts is None:
+            parts = self._build(template_name, shell_context)
+            with self._lock:
+                self.misses += 1
+                if self.max_entries:
+                    self._shells[cache_key] = parts
+                    if len(self._shells) > self.max_entries:
+                        self._shells.popitem(last=False)
+        if len(parts) == 1:
+            return parts[0]
+        context = dict(context)
+        if self._prepare_context is not None:
+            self._prepare_context(context)
+        return ''.join(self.environment.get_template(part[0]).render(dict(context, **part[1]) if part[1] else context)
+                       if index % 2 else part
+                       for index, part in enumerate(parts))
+
+    def clear(self):
+        with self._lock:
+            self._shells.clear()
+
+    def __len__(self):
+        return len(self._shells)
@@ -0,0 +1,120 @@
+"""Süreç içi soru bankası önbelleği.
+
+Question tablosu bir kez yüklenir; zamanlayıcı ve cevap kontrolü her turda
+veritabanına gitmek yerine buradaki değiştirilemez kayıtları kullanır.
+"""
+import logging
+import threading
+import time
+from typing import NamedTuple
+
+RETRY_SECONDS = 5  # Arka plan yenilemesi başarısız olursa tekrar deneme aralığı
+
+
+class QuestionRecord(NamedTuple):
+    """Tek bir sorunun hafif, değiştirilemez kopyası."""
+    id: int
+    correct_answer: str
+    payload: dict  # Question.to_dict() çıktısı; paylaşıldığı için değiştirmeyin, kopyalayın
+    category: str = None
+    difficulty: str = None
+
+    @classmethod
+    def from_question(cls, question):
+        return cls(question.id, question.correct_answer, question.to_dict(),
+                   question.category, question.difficulty)
+
+
+class QuestionBank:
+    """Question tablosunu bellekte tutar, TTL dolunca veya geçersiz kılınınca yeniler.
+
+    `loader` çağrıldığında id sırasına göre Question nesneleri döndürmelidir;
+    arka plan thread'inden de çağrıldığı için app context'i kendisi kurmalıdır.
+    `version` yalnızca yüklenen içerik değiştiğinde bir artar.
+
+    Aynı anda tek bir thread yükler. TTL dolduğunda yeniden yükleme arka
+    planda yapılır; çağıran thread (ör. cevap işleyen socket handler'ı) hiç
+    beklemez ve yükleme bitene kadar eski kayıtlar kullanılır. Yalnızca ilk
+    yüklemede ve invalidate() sonrasında çağıranlar yüklemenin bitmesini bekler.
+    """
+
+    def __init__(self, loader, ttl=60):
+        self._loader = loader
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._reload_lock = threading.RLock()  # Tek yükleyici
+        self._records = {}
+        self._ordered_ids = ()
+        self._loaded_at = None
+        self._generation = 0  # invalidate() sayacı; yükleme sürerken gelen geçersiz kılma kaybolmasın
+        self._background = False  # TTL yenilemesi arka planda sürüyor mu
+        self.version = 0
+
+    def refresh(self):
+        """Tabloyu yeniden yükler ve kayıtları tek seferde değiştirir."""
+        with self._reload_lock:
+            generation = self._generation
+            records = [QuestionRecord.from_question(q) for q in self._loader()]
+            by_id = {r.id: r for r in records}
+            with self._lock:
+                if by_id != self._records:
+                    self._records = by_id
+                    self._ordered_ids = tuple(r.id for r in records)
+                    self.version += 1
+                self._loaded_at = time.monotonic() if generation == self._generation else None
+            return self.version
+
+    def invalidate(self):
+        """Bir sonraki erişimde yeniden yüklemeye zorlar (soru eklendi/düzenlendi)."""
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    def _is_stale(self):
+        loaded_at = self._loaded_at
+        return loaded_at is None or bool(self._ttl and time.monotonic() - loaded_at > self._ttl)
+
+    def _refresh_in_background(self):
+        try:
+            with self._reload_lock:
+                if self._is_stale():
+                    self.refresh()
+        except Exception:
+            logging.exception("Question bank: Background refresh failed, keeping the previous questions.")
+            with self._lock:
+                if self._loaded_at is not None:
+                    # TTL kadar beklemeden ama her istekte de değil, birkaç saniye sonra tekrar dene
+                    self._loaded_at = time.monotonic() - self._ttl + min(RETRY_SECONDS, self._ttl)
+        finally:
+            self._background = False
+
+    def _ensure_fresh(self):
+        if not self._is_stale():
+            return
+        if self._loaded_at is not None:
+            # Eski kayıtlar hâlâ geçerli: yenilemeyi arka plana bırak, çağıranı bekletme
+            with self._lock:
+                if self._background:
+                    return
+                self._background = True
+            threading.Thread(target=self._refresh_in_background, daemon=True, name='question-bank-refresh').start()
+            return
+        with self._reload_lock:
+            if self._is_stale():  # Kilidi beklerken başkası yüklemiş olabilir
+                self.refresh()
+
+    def get(self, question_id):
+        """id'ye göre kaydı döndürür; bilinmeyen id için None."""
+        self._ensure_fresh()
+        try:
+            return self._records.get(int(question_id))
+        except (TypeError, ValueError):
+            return None
+
+    def ordered_ids(self):
+        """Soru id'lerini artan sırada (tuple) döndürür."""
+        self._ensure_fresh()
+        return self._ordered_ids
+
+    def __len__(self):
+        return len(self.ordered_ids())
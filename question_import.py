@@ -0,0 +1,121 @@
+"""Soru bankası içe aktarma: CSV / JSON Lines dosyalarını akış halinde okur.
+
+Dosya satır satır bir generator ile okunur ve sabit boyutlu parçalar
+(batch) halinde yazıcıya verilir; bellek kullanımı dosya boyutundan
+bağımsızdır. Her satır `external_id` ile tanımlanır (yoksa soru metninden
+kararlı bir anahtar türetilir); böylece aynı dosyayı tekrar içe aktarmak
+yalnızca değişen soruları günceller.
+
+Beklenen alanlar: question_text, option1..option4, correct_answer ve
+opsiyonel external_id, category, difficulty. correct_answer seçeneklerden
+birinin metni (veya 'option1'..'option4') olmalıdır.
+"""
+import csv
+import hashlib
+import json
+import time
+
+OPTION_FIELDS = ('option1', 'option2', 'option3', 'option4')
+# Question modelindeki kolon uzunlukları
+FIELD_LIMITS = {'external_id': 100, 'question_text': 500, 'option1': 100, 'option2': 100,
+                'option3': 100, 'option4': 100, 'correct_answer': 100, 'category': 50, 'difficulty': 20}
+
+
+def detect_format(path):
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def iter_rows(path, fmt=None):
+    """(satır no, ham sözlük) çiftlerini dosyadan tek tek üretir."""
+    fmt = fmt or detect_format(path)
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if fmt == 'csv':
+            # Başlık satırı 1. satırdır
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+        elif fmt == 'jsonl':
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, ValueError(f"invalid JSON: {e.msg}")
+        else:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def stable_key(question_text):
+    """external_id verilmemiş satırlar için soru metninden kararlı anahtar."""
+    normalized = ' '.join(question_text.lower().split())
+    return 'sha1:' + hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:32]
+
+
+def validate_row(raw):
+    """Ham satırı Question kolonlarına uyan sözlüğe çevirir; geçersizse ValueError."""
+    if isinstance(raw, Exception):
+        raise raw
+    if not isinstance(raw, dict):
+        raise ValueError("row is not an object")
+
+    row = {}
+    for field in FIELD_LIMITS:
+        value = raw.get(field)
+        value = str(value).strip() if value is not None else ''
+        if len(value) > FIELD_LIMITS[field]:
+            raise ValueError(f"{field} is longer than {FIELD_LIMITS[field]} characters")
+        row[field] = value or None
+
+    for field in ('question_text',) + OPTION_FIELDS + ('correct_answer',):
+        if not row[field]:
+            raise ValueError(f"missing {field}")
+
+    options = [row[field] for field in OPTION_FIELDS]
+    if row['correct_answer'] in OPTION_FIELDS:
+        # 'option3' gibi bir kolon adı verilmişse o seçeneğin metnini kullan
+        row['correct_answer'] = row[row['correct_answer']]
+    elif row['correct_answer'] not in options:
+        raise ValueError(f"correct_answer {row['correct_answer']!r} is not one of option1..option4")
+
+    if not row['external_id']:
+        row['external_id'] = stable_key(row['question_text'])
+    return row
+
+
+def import_questions(rows, write_batch, batch_size=1000, on_error=None):
+    """Satırları doğrular ve `write_batch(list)` ile parça parça yazar.
+
+    Aynı parçada tekrar eden external_id'lerden sonuncusu kalır (tek bir
+    upsert ifadesi aynı satırı iki kez güncelleyemez). Geçersiz satırlar
+    `on_error(satır no, hata)` ile bildirilir ve atlanır. İstatistik sözlüğü
+    döndürür.
+    """
+    stats = {'read': 0, 'written': 0, 'invalid': 0, 'batches': 0}
+    started = time.perf_counter()
+    batch = {}
+
+    def flush():
+        if batch:
+            write_batch(list(batch.values()))
+            stats['written'] += len(batch)
+            stats['batches'] += 1
+            batch.clear()
+
+    for line_no, raw in rows:
+        stats['read'] += 1
+        try:
+            row = validate_row(raw)
+        except ValueError as e:
+            stats['invalid'] += 1
+            if on_error:
+                on_error(line_no, e)
+            continue
+        batch[row['external_id']] = row
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_sec'] = stats['read'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
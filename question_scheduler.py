@@ -0,0 +1,93 @@
+"""Soru sırası: tekrar etmeyen, karıştırılmış (isteğe bağlı ağırlıklı) deste.
+
+Deste soru bankasındaki id'lerden bir kez kurulur; her `next()` çağrısı yalnızca
+bir imleci ilerletir (O(1)). Tüm sorular sorulmadan hiçbir soru tekrar gelmez;
+deste bitince yeniden karıştırılır. Soru bankası yenilenirse (version değişirse)
+bu turda henüz sorulmamış sorulardan yeni bir deste kurulur.
+"""
+import random
+
+
+def parse_weights(spec):
+    """'science:2,history:0.5' biçimindeki ayarı {'science': 2.0, 'history': 0.5} yapar."""
+    weights = {}
+    for part in (spec or '').split(','):
+        if ':' in part:
+            key, value = part.rsplit(':', 1)
+            weights[key.strip()] = float(value)
+    return weights
+
+
+class QuestionDeck:
+    """Soru bankası üzerinde tekrar etmeyen deste.
+
+    order='sequential' id sırasıyla döner; order='shuffle' her destede karıştırır.
+    Kategori/zorluk ağırlıkları verilirse karıştırma ağırlıklı yapılır (ağırlığı
+    yüksek sorular destenin başına daha sık düşer; ağırlığı 0 olanlar atlanır).
+    """
+
+    def __init__(self, bank, order='shuffle', category_weights=None, difficulty_weights=None, rng=None):
+        if order not in ('sequential', 'shuffle'):
+            raise ValueError(f"Unsupported question order: {order}")
+        self._bank = bank
+        self.order = order
+        self.category_weights = category_weights or {}
+        self.difficulty_weights = difficulty_weights or {}
+        self._rng = rng or random.Random()
+        self._deck = []
+        self._cursor = 0
+        self._played = set()  # Bu destede sorulmuş id'ler
+        self._bank_version = None
+        self.last_id = None
+
+    def _weight(self, record):
+        return (self.category_weights.get(record.category, 1.0)
+                * self.difficulty_weights.get(record.difficulty, 1.0))
+
+    def _build(self, ids):
+        if self.order == 'sequential':
+            return list(ids)
+        if not self.category_weights and not self.difficulty_weights:
+            deck = list(ids)
+            self._rng.shuffle(deck)
+            return deck
+        # Ağırlıklı karıştırma (Efraimidis-Spirakis): anahtar = u^(1/w), büyükten küçüğe
+        keyed = []
+        for qid in ids:
+            weight = self._weight(self._bank.get(qid))
+            if weight > 0:
+                keyed.append((self._rng.random() ** (1.0 / weight), qid))
+        keyed.sort(reverse=True)
+        return [qid for _, qid in keyed]
+
+    def _new_cycle(self, ids):
+        self._played.clear()
+        self._deck = self._build(ids)
+        self._cursor = 0
+        # Yeni destenin ilk sorusu bir önceki soruyla aynı olmasın
+        if len(self._deck) > 1 and self._deck[0] == self.last_id:
+            self._deck[0], self._deck[-1] = self._deck[-1], self._deck[0]
+
+    def next(self):
+        """Sıradaki QuestionRecord'u döndürür; banka boşsa None."""
+        ids = self._bank.ordered_ids()
+        if self._bank.version != self._bank_version:
+            # Banka değişti: bu destede henüz sorulmamış sorularla devam et
+            self._bank_version = self._bank.version
+            remaining = [qid for qid in ids if qid not in self._played]
+            if remaining:
+                self._deck = self._build(remaining)
+                self._cursor = 0
+            else:
+                self._new_cycle(ids)
+
+        if self._cursor >= len(self._deck):
+            self._new_cycle(ids)
+        if not self._deck:
+            return None
+
+        qid = self._deck[self._cursor]
+        self._cursor += 1
+        self._played.add(qid)
+        self.last_id = qid
+        return self._bank.get(qid)
@@ -0,0 +1,114 @@
+"""Oda (mekan/masa) bazında bağımsız quiz oyunları.
+
+Her odanın kendi soru destesi, tur durumu ve skor tablosu vardır; yayınlar
+Socket.IO odalarına (`to=oda_adı`) gider. Odaların saatini tek bir
+PhaseScheduler sürer (bkz. round_clock.py).
+"""
+import re
+import threading
+
+from answer_guard import RoundAnswerSet
+from leaderboard import Leaderboard
+
+ROOM_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+
+def normalize_room_name(name):
+    """Oda adını küçük harfe çevirir; geçersizse None döndürür."""
+    if not name:
+        return None
+    name = str(name).strip().lower()
+    return name if ROOM_NAME_PATTERN.match(name) else None
+
+
+class Room:
+    """Tek bir oyunun durumu.
+
+    `state` alanları: question (QuestionRecord), question_id, round_id,
+    end_time (datetime), snapshot (RoundSnapshot). Destenin (`deck`) yalnızca
+    lider süreçte kullanılması beklenir. `answered` bu worker'a gelen ilk
+    cevapları, `scored` (tüm worker'lardan gelen) puanlanmış cevapları tur
+    başına tekilleştirir. `stats` geçerli turun cevap sayaçlarıdır
+    (round_stats.RoundStats; ilk tur başlayana kadar None).
+    `local_clients` bu worker'da odaya bağlı istemci sayısıdır (bkz.
+    RoomRegistry.track_client); `idle_rounds` liderin oyuncusuz geçen tur
+    sayacıdır.
+    """
+
+    def __init__(self, name, deck):
+        self.name = name
+        self.deck = deck
+        self.leaderboard = Leaderboard()
+        self.answered = RoundAnswerSet()
+        self.scored = RoundAnswerSet()
+        self.stats = None
+        self.state = {
+            "question": None,
+            "end_time": None,
+            "question_id": None,
+            "round_id": None,
+            "snapshot": None,
+        }
+        self.round_id = None  # Liderin bu oda için yayınladığı son tur (soru yoksa None)
+        self.local_clients = 0
+        self.idle_rounds = 0
+
+    def __repr__(self):
+        return f'<Room {self.name} round={self.state["round_id"]}>'
+
+
+class RoomRegistry:
+    """Oda adı → Room; odalar ilk kullanımda `factory(name)` ile oluşturulur.
+
+    `pinned` odalar (yapılandırmada açılanlar) hiçbir zaman kaldırılmaz.
+    """
+
+    def __init__(self, factory, max_rooms=500, pinned=()):
+        self._factory = factory
+        self.max_rooms = max_rooms
+        self.pinned = frozenset(pinned)
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def __contains__(self, name):
+        return name in self._rooms
+
+    def get(self, name):
+        return self._rooms.get(name)
+
+    def get_or_create(self, name):
+        """Odayı döndürür; yoksa oluşturur. Oda sınırı aşılırsa None."""
+        room = self._rooms.get(name)
+        if room is not None:
+            return room
+        with self._lock:
+            room = self._rooms.get(name)
+            if room is None:
+                if len(self._rooms) >= self.max_rooms:
+                    return None
+                room = self._factory(name)
+                self._rooms[name] = room
+            return room
+
+    def all(self):
+        return list(self._rooms.values())
+
+    def track_client(self, name, delta):
+        """Odanın bu worker'daki istemci sayısını `delta` kadar değiştirir (oda yoksa yok sayılır)."""
+        with self._lock:
+            room = self._rooms.get(name)
+            if room is not None:
+                room.local_clients = max(0, room.local_clients + delta)
+
+    def remove(self, name):
+        """Sabit olmayan ve bu worker'da istemcisi kalmamış odayı kaldırır; kaldırılan Room veya None."""
+        if name in self.pinned:
+            return None
+        with self._lock:
+            room = self._rooms.get(name)
+            if room is None or room.local_clients:
+                return None
+            return self._rooms.pop(name)
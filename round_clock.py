@@ -0,0 +1,151 @@
+"""Kaymasız (drift-free) tur saati.
+
+Faz sınırları mutlak monotonic zamanlar olarak hesaplanır:
+`başlangıç + tur_no * tur_süresi + faz_ofseti`. Böylece sorgu/yayın için
+harcanan süre bir sonraki tura eklenmez ve duvar saati atlamaları
+(NTP, yaz saati) zamanlamayı bozmaz. Her fazda planlanan ile gerçek uyanma
+arasındaki fark (jitter) ölçülür. Tüm odalar tek bir heap tabanlı
+zamanlayıcı ile sürülür.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+
+class Phase(NamedTuple):
+    name: str
+    duration: float  # saniye; 0 olan faz beklemeden tetiklenir
+
+
+class PhaseTick(NamedTuple):
+    key: str  # Oda adı
+    round_no: int
+    phase: str
+    start: float  # Planlanan başlangıç (time.monotonic)
+    deadline: float  # Planlanan bitiş (time.monotonic)
+    jitter: float  # Gerçek uyanma - planlanan başlangıç (saniye)
+
+
+class JitterStats:
+    """Son N ölçümün jitter özetini tutar."""
+
+    def __init__(self, window=500):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value):
+        self._samples.append(value)
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def summary(self):
+        """Milisaniye cinsinden {count, p50, p95, max} (son pencere için p50/p95)."""
+        if not self._samples:
+            return {'count': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        ordered = sorted(self._samples)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {'count': self.count,
+                'p50_ms': round(pick(0.50) * 1000, 3),
+                'p95_ms': round(pick(0.95) * 1000, 3),
+                'max_ms': round(self.max * 1000, 3)}
+
+
+class PhaseScheduler:
+    """Birçok oda/oyunun faz saatini tek bir thread ve bir min-heap ile sürer.
+
+    Her anahtar (ör. oda adı) kendi faz listesi ve başlangıç anıyla eklenir;
+    heap'te yalnızca her anahtarın bir sonraki faz sınırı durur. Oda başına
+    thread gerekmez: yüzlerce oyun için ekleme/çıkarma O(log n)'dir.
+    """
+
+    def __init__(self, clock=time.monotonic, max_idle_wait=0.5):
+        self._clock = clock
+        self._max_idle_wait = max_idle_wait  # stop_event'i ve yeni eklemeleri kontrol aralığı
+        self._heap = []  # (planlanan an, sıra no, anahtar, nesil, tur no, faz indeksi)
+        self._schedules = {}  # anahtar -> [fazlar, tur süresi, başlangıç, nesil]
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._seq = itertools.count()
+        self._stopped = False
+        self.jitter = JitterStats()
+
+    def __len__(self):
+        return len(self._schedules)
+
+    def __contains__(self, key):
+        return key in self._schedules
+
+    def add(self, key, phases, start=None, first_phase=0):
+        """Anahtarı `start` anından (varsayılan: şimdi) itibaren faz döngüsüne ekler.
+
+        `first_phase` > 0 ise ilk tur o fazdan başlar (ör. yarıda kalmış bir
+        turu geri yüklerken); `start` yine turun başlangıç anıdır.
+        """
+        phases = [Phase(name, float(duration)) for name, duration in phases]
+        cycle = sum(phase.duration for phase in phases)
+        if cycle <= 0:
+            raise ValueError("Round phases must have a positive total duration")
+        origin = self._clock() if start is None else start
+        planned = origin + sum(phase.duration for phase in phases[:first_phase])
+        with self._lock:
+            generation = self._schedules[key][3] + 1 if key in self._schedules else 0
+            self._schedules[key] = [phases, cycle, origin, generation]
+            heapq.heappush(self._heap, (planned, next(self._seq), key, generation, 0, first_phase))
+        self._wake.set()
+
+    def remove(self, key):
+        """Anahtarı döngüden çıkarır (heap'teki kaydı tetiklendiğinde atlanır)."""
+        with self._lock:
+            self._schedules.pop(key, None)
+        self._wake.set()
+
+    def stop(self):
+        """run() döngüsünü bir sonraki kontrolde bitirir (ör. liderlik kaybedildiğinde)."""
+        self._stopped = True
+        self._wake.set()
+
+    def _pop_due(self):
+        """Zamanı gelen kaydı çıkarır; yoksa (None, beklenecek süre) döner."""
+        with self._lock:
+            while self._heap:
+                planned, _, key, generation, round_no, index = self._heap[0]
+                schedule = self._schedules.get(key)
+                if schedule is None or schedule[3] != generation:
+                    heapq.heappop(self._heap)  # Çıkarılmış veya yeniden eklenmiş anahtar
+                    continue
+                remaining = planned - self._clock()
+                if remaining > 0:
+                    return None, min(remaining, self._max_idle_wait)
+                heapq.heappop(self._heap)
+                phases, cycle, origin, _ = schedule
+                phase = phases[index]
+
+                # Sıradaki fazı mutlak zamanla planla
+                next_index, next_round = index + 1, round_no
+                if next_index == len(phases):
+                    next_index, next_round = 0, round_no + 1
+                    # Bir turdan fazla geride kalındıysa tur atlamak yerine yeniden hizala
+                    behind = self._clock() - (origin + next_round * cycle)
+                    if behind > cycle:
+                        origin = schedule[2] = origin + behind
+                next_planned = origin + next_round * cycle + sum(p.duration for p in phases[:next_index])
+                heapq.heappush(self._heap, (next_planned, next(self._seq), key, generation, next_round, next_index))
+                return (key, round_no, phase, planned), 0
+            return None, self._max_idle_wait
+
+    def run(self, stop_event, callback):
+        """stop_event set edilene (veya stop() çağrılana) kadar zamanı gelen her faz için `callback(PhaseTick)` çağırır."""
+        while not stop_event.is_set() and not self._stopped:
+            due, wait = self._pop_due()
+            if due is None:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            key, round_no, phase, planned = due
+            jitter = self._clock() - planned
+            self.jitter.add(jitter)
+            callback(PhaseTick(key, round_no, phase.name, planned, planned + phase.duration, jitter))
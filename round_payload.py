@@ -0,0 +1,89 @@
+"""Tur yayın paketi: her tur için bir kez kodlanan değiştirilemez bytes.
+
+Yeni soru hem tüm istemcilere yayınlanırken hem de sonradan bağlanan her
+istemciye gönderilirken aynı bytes nesnesi kullanılır; yeniden bağlanma
+fırtınasında sözlük kurma/JSON üretme tekrar edilmez.
+
+İki kodlama vardır:
+    json     UTF-8 JSON (varsayılan)
+    compact  Uzunluk önekli ikili format (istemci ilk iki bayttaki b'Q1' ile tanır):
+             b'Q1' | u32 id | u32 duration_ms | str round_id | str end_time |
+             str question_text | u8 seçenek sayısı | str seçenek...
+             (str = u16 bayt uzunluğu + UTF-8, hepsi big-endian)
+
+Kalan süre paketin içinde değil, gönderim anında ikinci argüman olarak
+(`remaining_ms`) gider; istemci geri sayımı kendi saatine göre bundan kurar.
+"""
+import json
+import struct
+import time
+from typing import NamedTuple
+
+COMPACT_MAGIC = b'Q1'
+ENCODINGS = ('json', 'compact')
+
+
+def _pack_str(value):
+    data = value.encode('utf-8')
+    return struct.pack('>H', len(data)) + data
+
+
+def encode_compact(payload):
+    parts = [
+        COMPACT_MAGIC,
+        struct.pack('>II', payload['id'], payload['duration_ms']),
+        _pack_str(payload['round_id']),
+        _pack_str(payload['end_time']),
+        _pack_str(payload['question_text']),
+        struct.pack('>B', len(payload['options'])),
+    ]
+    parts.extend(_pack_str(option) for option in payload['options'])
+    return b''.join(parts)
+
+
+def decode_compact(data):
+    """encode_compact'ın tersi (testler ve araçlar için)."""
+    if data[:2] != COMPACT_MAGIC:
+        raise ValueError("Not a compact round payload")
+    question_id, duration_ms = struct.unpack_from('>II', data, 2)
+    offset = 10
+
+    def read_str():
+        nonlocal offset
+        (length,) = struct.unpack_from('>H', data, offset)
+        offset += 2 + length
+        return data[offset - length:offset].decode('utf-8')
+
+    round_id, end_time, question_text = read_str(), read_str(), read_str()
+    count = data[offset]
+    offset += 1
+    options = [read_str() for _ in range(count)]
+    return {'id': question_id, 'duration_ms': duration_ms, 'round_id': round_id,
+            'end_time': end_time, 'question_text': question_text, 'options': options}
+
+
+class RoundSnapshot(NamedTuple):
+    """Bir turun kodlanmış paketi ve bu sürecin monotonic saatine göre bitiş anı."""
+    question_id: int
+    round_id: str
+    deadline: float  # time.monotonic() cinsinden
+    data: bytes
+
+    def remaining_ms(self, now=None):
+        now = time.monotonic() if now is None else now
+        return max(0, int((self.deadline - now) * 1000))
+
+
+def build_snapshot(question_payload, round_id, end_time_iso, remaining_seconds, encoding='json'):
+    """Soru paketini (to_dict) tur bilgisiyle birlikte bir kez kodlar."""
+    payload = dict(question_payload)
+    payload['round_id'] = round_id
+    payload['end_time'] = end_time_iso
+    payload['duration_ms'] = max(0, int(remaining_seconds * 1000))
+    if encoding == 'compact':
+        data = encode_compact(payload)
+    elif encoding == 'json':
+        data = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    else:
+        raise ValueError(f"Unsupported round payload encoding: {encoding}")
+    return RoundSnapshot(payload['id'], round_id, time.monotonic() + remaining_seconds, data)
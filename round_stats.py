@@ -0,0 +1,132 @@
+"""Tur başına cevap istatistikleri: seçenek dağılımı, cevap süresi histogramı, en hızlılar.
+
+Sayaçlar cevaplar geldikçe O(1) güncellenir; tur bittiğinde veritabanında
+cevap satırlarını taramak gerekmez. Histogram sabit boyutlu bir dizidir:
+`bucket_ms` genişliğinde `bucket_count` kova, son kova taşanları toplar.
+
+`aggregate_history` aynı istatistikleri olay günlüğündeki geçmiş cevaplar
+üzerinde NumPy ile toplu (vektörel) hesaplar (opsiyonel bağımlılık:
+`pip install numpy`).
+"""
+import heapq
+import threading
+from array import array
+
+HISTOGRAM_BUCKET_MS = 500
+HISTOGRAM_BUCKETS = 40  # 0-20 sn; son kova daha geç gelenleri de sayar
+FASTEST_COUNT = 5
+
+
+def histogram_bucket(elapsed_ms, bucket_ms=HISTOGRAM_BUCKET_MS, bucket_count=HISTOGRAM_BUCKETS):
+    return min(max(int(elapsed_ms), 0) // bucket_ms, bucket_count - 1)
+
+
+class RoundStats:
+    """Tek bir turun cevap sayaçları (broker olayları farklı thread'lerden gelebilir)."""
+
+    def __init__(self, round_id, question_id, options, bucket_ms=HISTOGRAM_BUCKET_MS,
+                 bucket_count=HISTOGRAM_BUCKETS, fastest_count=FASTEST_COUNT):
+        self.round_id = round_id
+        self.question_id = question_id
+        self.options = list(options)
+        self._option_index = {option: index for index, option in enumerate(self.options)}
+        self.option_counts = array('I', [0] * len(self.options))
+        self.bucket_ms = bucket_ms
+        self.histogram = array('I', [0] * bucket_count)
+        self.total = 0
+        self.correct = 0
+        self.fastest_count = fastest_count
+        self._fastest = []  # (-elapsed_ms, -sıra, user_id, isim): en yavaşı başta, en fazla fastest_count
+        self._lock = threading.Lock()
+
+    def add(self, answer, correct, elapsed_ms, user_id=None, name=None):
+        index = self._option_index.get(answer)
+        if index is None:
+            return  # Seçeneklerde olmayan cevap (ör. eski tur) sayılmaz
+        with self._lock:
+            self.option_counts[index] += 1
+            self.total += 1
+            if elapsed_ms is not None:
+                self.histogram[histogram_bucket(elapsed_ms, self.bucket_ms, len(self.histogram))] += 1
+            if correct:
+                self.correct += 1
+                if elapsed_ms is not None:
+                    entry = (-elapsed_ms, -self.correct, user_id, name)  # Eşit sürede önce gelen önde
+                    if len(self._fastest) < self.fastest_count:
+                        heapq.heappush(self._fastest, entry)
+                    elif entry > self._fastest[0]:
+                        heapq.heapreplace(self._fastest, entry)
+
+    def fastest(self):
+        """En hızlı doğru cevaplayanlar: [[isim, ms], ...] hızlıdan yavaşa."""
+        with self._lock:
+            fastest = sorted(self._fastest, reverse=True)
+        return [[name, -negative_ms] for negative_ms, _, _, name in fastest]
+
+    def to_dict(self):
+        fastest = self.fastest()
+        with self._lock:
+            return {
+                'round_id': self.round_id,
+                'question_id': self.question_id,
+                'options': self.options,
+                'counts': self.option_counts.tolist(),
+                'total': self.total,
+                'correct': self.correct,
+                'histogram': {'bucket_ms': self.bucket_ms, 'counts': self.histogram.tolist()},
+                'fastest': fastest,
+            }
+
+
+def aggregate_history(answers, options_by_question, chunk_size=100000,
+                      bucket_ms=HISTOGRAM_BUCKET_MS, bucket_count=HISTOGRAM_BUCKETS):
+    """Geçmiş cevapları (score olayları) soru başına NumPy ile toplar.
+
+    `answers` (question_id, answer, correct, elapsed_ms) dörtlüleri üretir;
+    parça parça (chunk_size) dizilere çevrilip np.add.at ile toplanır, bellek
+    kullanımı parça boyutu + soru sayısıyla sınırlıdır. Soru başına
+    {'counts', 'total', 'correct', 'histogram'} döndürür.
+    """
+    import numpy as np  # Opsiyonel bağımlılık: yalnızca çevrimdışı analizde gerekir
+
+    question_ids = list(options_by_question)
+    row_of = {question_id: row for row, question_id in enumerate(question_ids)}
+    option_index = {(question_id, option): index
+                    for question_id, options in options_by_question.items()
+                    for index, option in enumerate(options)}
+    width = max((len(options) for options in options_by_question.values()), default=0)
+    counts = np.zeros((len(question_ids), width), dtype=np.int64)
+    correct = np.zeros(len(question_ids), dtype=np.int64)
+    histogram = np.zeros((len(question_ids), bucket_count), dtype=np.int64)
+
+    def flush(rows, options, is_correct, elapsed):
+        rows = np.asarray(rows, dtype=np.int64)
+        np.add.at(counts, (rows, np.asarray(options, dtype=np.int64)), 1)
+        np.add.at(correct, rows, np.asarray(is_correct, dtype=np.int64))
+        elapsed = np.asarray(elapsed, dtype=np.float64)
+        timed = ~np.isnan(elapsed)
+        buckets = np.minimum(np.clip(elapsed[timed], 0, None) // bucket_ms, bucket_count - 1).astype(np.int64)
+        np.add.at(histogram, (rows[timed], buckets), 1)
+
+    chunk = ([], [], [], [])
+    for question_id, answer, is_correct, elapsed_ms in answers:
+        index = option_index.get((question_id, answer))
+        if index is None:
+            continue
+        chunk[0].append(row_of[question_id])
+        chunk[1].append(index)
+        chunk[2].append(bool(is_correct))
+        chunk[3].append(float('nan') if elapsed_ms is None else elapsed_ms)
+        if len(chunk[0]) >= chunk_size:
+            flush(*chunk)
+            chunk = ([], [], [], [])
+    if chunk[0]:
+        flush(*chunk)
+
+    totals = counts.sum(axis=1)
+    return {question_id: {'options': list(options_by_question[question_id]),
+                          'counts': counts[row, :len(options_by_question[question_id])].tolist(),
+                          'total': int(totals[row]),
+                          'correct': int(correct[row]),
+                          'histogram': {'bucket_ms': bucket_ms, 'counts': histogram[row].tolist()}}
+            for row, question_id in enumerate(question_ids) if totals[row]}
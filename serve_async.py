@@ -0,0 +1,64 @@
+"""Yüksek eşzamanlılık için cooperative (greenlet tabanlı) sunucu giriş noktası.
+
+Threading modunda her uzun ömürlü Socket.IO bağlantısı bir işletim sistemi
+thread'i tutar. Bu giriş noktası standart kütüphaneyi gevent (veya eventlet)
+ile yamalar; böylece bağlantılar, quiz zamanlayıcısı, broker ve cevap
+yazıcısı greenlet olarak çalışır. Facebook'a giden `requests` çağrıları ve
+PostgreSQL erişimi (psycogreen ile) olay döngüsünü bloklamaz.
+
+Kurulum (opsiyonel bağımlılıklar, requirements.txt'te yok çünkü kurulu
+olmaları app.py'nin varsayılan async_mode seçimini değiştirir):
+
+    pip install gevent gevent-websocket psycogreen
+
+Çalıştırma:
+
+    python serve_async.py                        # gevent (varsayılan)
+    QUIZ_ASYNC_BACKEND=eventlet python serve_async.py
+
+Gunicorn ile (worker'lar arası olaylar için QUIZ_BROKER_URL, bkz. gunicorn.conf.py).
+Yama worker içinde yapıldığı için uygulama master'da ön yüklenmemelidir:
+
+    GUNICORN_PRELOAD=0 SOCKETIO_ASYNC_MODE=gevent gunicorn -c gunicorn.conf.py \\
+        -k geventwebsocket.gunicorn.workers.GeventWebSocketWorker -w 1
+
+Not: SQLite sürücüsü C seviyesinde bloklar; yoğun yükte PostgreSQL kullanın.
+"""
+import os
+
+ASYNC_BACKEND = os.environ.get('QUIZ_ASYNC_BACKEND', 'gevent')
+
+# Yama, diğer tüm importlardan önce yapılmalı
+if ASYNC_BACKEND == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_BACKEND == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+else:
+    raise SystemExit(f"Unsupported QUIZ_ASYNC_BACKEND: {ASYNC_BACKEND}")
+
+try:
+    # psycopg2 C sürücüsünü greenlet dostu yap (PostgreSQL sorguları döngüyü bloklamasın)
+    if ASYNC_BACKEND == 'eventlet':
+        from psycogreen.eventlet import patch_psycopg
+    else:
+        from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+    PSYCOPG_PATCHED = True
+except ImportError:
+    PSYCOPG_PATCHED = False
+
+os.environ['SOCKETIO_ASYNC_MODE'] = ASYNC_BACKEND
+
+import logging  # noqa: E402
+from app import app, socketio, start_quiz_timer  # noqa: E402  (yamadan sonra import edilmeli)
+
+
+if __name__ == '__main__':
+    if not PSYCOPG_PATCHED and app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        logging.warning("psycogreen is not installed; PostgreSQL queries will block the event loop.")
+    start_quiz_timer()
+    port = int(os.environ.get('PORT', 5001))
+    logging.info(f"Starting {ASYNC_BACKEND} SocketIO server on host 0.0.0.0 port {port}")
+    socketio.run(app, host='0.0.0.0', port=port)
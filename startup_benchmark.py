@@ -0,0 +1,187 @@
+"""Açılış süresini ölçer: import, şema kontrolü ve ilk isteğe kadar geçen süre.
+
+Her ölçüm temiz bir Python sürecinde yapılır (modül önbelleği paylaşılmaz):
+
+    import_ms            `import app` süresi (Flask, SQLAlchemy, Socket.IO dahil)
+    factory_import_ms    `import wsgi` süresi (app.py'yi yüklememeli)
+    schema_check_ms      ensure_schema_once: tam kontrol (cold) ve parmak izi eşleşince (warm)
+    first_request_ms     sunucu sürecinin başlatılmasından ilk başarılı GET /login'e kadar
+                         (python app.py, gunicorn preload açık/kapalı)
+    worker_respawn_ms    tek worker'lı gunicorn'da worker öldürüldükten sonra yenisinin ilk cevabına
+                         kadar (otomatik yeniden başlatma / max_requests senaryosu)
+
+Sonuçların medyanı yazılır; JSON çıktısı sürümler arası karşılaştırma içindir.
+
+Örnekler:
+
+    python startup_benchmark.py
+    python startup_benchmark.py --repeat 10 --workers 4 --output startup.json
+    python startup_benchmark.py --database-url postgresql://quiz@localhost/quiz_bench
+
+Dikkat: --database-url ile verilen veritabanına tablolar ve örnek sorular eklenir.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Alt süreçte çalışır; süreyi milisaniye olarak yazdırır
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import {module}
+print((time.perf_counter() - started) * 1000)
+"""
+
+SCHEMA_SNIPPET = """
+import json, time
+import app
+with app.app.app_context():
+    started = time.perf_counter()
+    app.ensure_schema_once(force=True)
+    cold = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    app.ensure_schema_once()
+    warm = (time.perf_counter() - started) * 1000
+print(json.dumps({'cold': cold, 'warm': warm}))
+"""
+
+
+def python_output(code, env):
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, env=env, check=True,
+                            capture_output=True, text=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def median(values):
+    return round(statistics.median(values), 1) if values else None
+
+
+def start_server(command, env, port):
+    log = open(os.path.join(tempfile.gettempdir(), 'cafe_quiz_startup_benchmark.log'), 'a')
+    server = subprocess.Popen(command, cwd=REPO_DIR, env=dict(env, PORT=str(port)), stdout=log, stderr=log,
+                              start_new_session=True)
+    server.log = log
+    return server
+
+
+def stop_server(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(10)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+    server.log.close()
+
+
+def wait_until_ready(server, port, timeout):
+    """/login 200 dönene kadar bekler."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited during startup, see {server.log.name}")
+        try:
+            # gunicorn bağlantıyı worker hazır olmadan kabul eder; cevap gelene kadar bekle
+            if requests.get(f"http://127.0.0.1:{port}/login", timeout=(1, timeout)).status_code == 200:
+                return
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.005)
+    raise SystemExit(f"Server did not answer within {timeout} seconds, see {server.log.name}")
+
+
+def time_to_first_request(command, env, port, timeout):
+    """Süreci başlatır, ilk başarılı cevaba kadar geçen süreyi (ms) döndürür ve süreci kapatır."""
+    started = time.perf_counter()
+    server = start_server(command, env, port)
+    try:
+        wait_until_ready(server, port, timeout)
+        return (time.perf_counter() - started) * 1000
+    finally:
+        stop_server(server)
+
+
+def worker_respawn(command, env, port, timeout):
+    """Tek worker'lı gunicorn'da worker'ı öldürür; yeni worker'ın ilk cevabına kadar geçen süre (ms)."""
+    server = start_server(command + ['-w', '1'], env, port)
+    try:
+        wait_until_ready(server, port, timeout)
+        with open(f"/proc/{server.pid}/task/{server.pid}/children") as f:
+            worker_pid = int(f.read().split()[0])
+        started = time.perf_counter()
+        os.kill(worker_pid, signal.SIGKILL)
+        wait_until_ready(server, port, timeout)
+        return (time.perf_counter() - started) * 1000
+    finally:
+        stop_server(server)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time, schema check time and time to first request.")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement (median is reported).")
+    parser.add_argument('--workers', type=int, default=2, help="Gunicorn workers.")
+    parser.add_argument('--database-url', help="Defaults to a temporary SQLite file.")
+    parser.add_argument('--port', type=int, default=5066)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--output', help="Write results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup_bench.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, FLASK_APP='app.py',
+               EVENT_LOG_DIR=tempfile.mkdtemp(), QUIZ_LEADER_LOCK=os.path.join(tempfile.mkdtemp(), 'leader.lock'))
+    env.pop('QUIZ_BROKER_URL', None)
+    for command in ('db-create', 'db-seed'):
+        subprocess.run([sys.executable, '-m', 'flask', command], cwd=REPO_DIR, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+
+    results = {
+        'import_ms': median([float(python_output(IMPORT_SNIPPET.format(module='app'), env))
+                             for _ in range(args.repeat)]),
+        'factory_import_ms': median([float(python_output(IMPORT_SNIPPET.format(module='wsgi'), env))
+                                     for _ in range(args.repeat)]),
+    }
+    schema = [json.loads(python_output(SCHEMA_SNIPPET, env)) for _ in range(args.repeat)]
+    results['schema_check_ms'] = {'cold': median([run['cold'] for run in schema]),
+                                  'warm': median([run['warm'] for run in schema])}
+
+    servers = {'app.py': ([sys.executable, 'app.py'], {})}
+    gunicorn = shutil.which('gunicorn')
+    if gunicorn:
+        command = [gunicorn, '-c', 'gunicorn.conf.py', '--threads', '8']
+        servers['gunicorn_preload'] = (command + ['-w', str(args.workers)], {'GUNICORN_PRELOAD': '1'})
+        servers['gunicorn_no_preload'] = (command + ['-w', str(args.workers)], {'GUNICORN_PRELOAD': '0'})
+    else:
+        print("gunicorn not found, measuring app.py only")
+    results['first_request_ms'] = {
+        name: median([time_to_first_request(command, dict(env, **extra_env), args.port, args.timeout)
+                      for _ in range(args.repeat)])
+        for name, (command, extra_env) in servers.items()
+    }
+    if gunicorn:
+        results['worker_respawn_ms'] = {
+            name: median([worker_respawn(command, dict(env, GUNICORN_PRELOAD=preload), args.port, args.timeout)
+                          for _ in range(args.repeat)])
+            for name, preload in (('gunicorn_preload', '1'), ('gunicorn_no_preload', '0'))
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'database': database_url.split('://')[0], 'python': platform.python_version(),
+                       'params': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Statik dosyalar için bellek içi varlık (asset) hattı.
+
+Her dosya ilk istendiğinde bir kez okunur; içerik hash'inden ETag, sürüm
+(URL'deki ?v=...) ve SRI (integrity) değeri hesaplanır, gzip ve (brotli
+kuruluysa) br sıkıştırılmış halleri önceden üretilir. İstek başına yalnızca
+hazır bytes seçilip döndürülür; dosya değişirse (mtime) yeniden yüklenir.
+
+Opsiyonel bağımlılık: `pip install brotli` (yoksa yalnızca gzip).
+"""
+import base64
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import NamedTuple
+
+# Bu türler zaten sıkıştırılmıştır ya da sıkıştırmadan kazanç azdır
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Asset(NamedTuple):
+    """Tek bir statik dosyanın hazır yanıt gövdeleri ve başlık değerleri."""
+    data: bytes
+    encodings: dict  # 'br' / 'gzip' -> sıkıştırılmış bytes (yalnızca daha küçükse)
+    mimetype: str
+    etag: str
+    version: str  # URL'de ?v= olarak kullanılan kısa içerik hash'i
+    integrity: str  # <script integrity="..."> için sha384
+    mtime: float
+
+    def select(self, accepts):
+        """İstemcinin kabul ettiği en küçük gövdeyi seçer: (bytes, encoding veya None).
+
+        `accepts(name)` kodlama kabul ediliyorsa True döndürmelidir (ör. Flask'ta
+        `lambda name: request.accept_encodings[name] > 0`).
+        """
+        for encoding in ('br', 'gzip'):
+            body = self.encodings.get(encoding)
+            if body is not None and accepts(encoding):
+                return body, encoding
+        return self.data, None
+
+
+def _compress(data):
+    encodings = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli  # Opsiyonel bağımlılık
+    except ImportError:
+        pass
+    else:
+        encodings['br'] = brotli.compress(data, quality=11)
+    return {name: body for name, body in encodings.items() if len(body) < len(data)}
+
+
+def load_asset(path, compress_min_bytes=1024):
+    with open(path, 'rb') as f:
+        data = f.read()
+    mtime = os.path.getmtime(path)
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    digest = hashlib.sha256(data).hexdigest()
+    encodings = {}
+    if len(data) >= compress_min_bytes and mimetype.startswith(COMPRESSIBLE_TYPES):
+        encodings = _compress(data)
+    integrity = 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode('ascii')
+    return Asset(data, encodings, mimetype, digest[:32], digest[:12], integrity, mtime)
+
+
+class StaticAssets:
+    """`root` altındaki dosyaları göreli yola göre önbellekte tutar."""
+
+    def __init__(self, root, compress_min_bytes=1024, check_mtime=True):
+        self.root = os.path.abspath(root)
+        self.compress_min_bytes = compress_min_bytes
+        self.check_mtime = check_mtime
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def _path(self, filename):
+        path = os.path.abspath(os.path.join(self.root, filename))
+        # ../ ile kök dizinin dışına çıkılmasın
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def get(self, filename):
+        """Dosyanın Asset kaydını döndürür; yoksa None."""
+        asset = self._assets.get(filename)
+        if asset is not None and not self.check_mtime:
+            return asset
+        path = self._path(filename)
+        if path is None:
+            return None
+        if asset is None or os.path.getmtime(path) != asset.mtime:
+            asset = load_asset(path, self.compress_min_bytes)
+            with self._lock:
+                self._assets[filename] = asset
+        return asset
+
+    def preload(self):
+        """Kök dizindeki tüm dosyaları önceden yükleyip sıkıştırır (başlangıçta)."""
+        count = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if self.get(os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, '/')):
+                    count += 1
+        return count
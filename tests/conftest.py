@@ -0,0 +1,5 @@
+"""Testler için ortak ayarlar: modüller depo kökünde düz durduğu için kök sys.path'e eklenir."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
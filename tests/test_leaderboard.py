@@ -0,0 +1,66 @@
+"""IndexableSkipList ve Leaderboard'un sıralı bir listeye karşı davranış testleri."""
+import bisect
+import random
+
+from leaderboard import IndexableSkipList, Leaderboard
+
+
+def expected_top(scores, names, n):
+    """Aynı sıralamayı düz bir sıralı listeyle hesaplar (eşitler aynı sırayı paylaşır)."""
+    ordered = sorted((-score, user_id) for user_id, score in scores.items())
+    result = []
+    for neg_score, user_id in ordered[:n]:
+        rank = bisect.bisect_left(ordered, (neg_score,)) + 1
+        result.append([rank, names[user_id], -neg_score])
+    return result
+
+
+def test_skip_list_matches_sorted_list():
+    rng = random.Random(42)
+    skip_list, reference = IndexableSkipList(), []
+    for _ in range(2000):
+        key = rng.randrange(300)
+        if key in reference and rng.random() < 0.5:
+            skip_list.remove(key)
+            reference.remove(key)
+        else:
+            skip_list.insert(key)
+            bisect.insort(reference, key)
+        probe = rng.randrange(-5, 305)
+        assert skip_list.bisect_left(probe) == bisect.bisect_left(reference, probe)
+    assert len(skip_list) == len(reference)
+    assert list(skip_list) == reference
+
+
+def test_rank_and_top_match_sorted_list():
+    rng = random.Random(7)
+    board, scores, names = Leaderboard(), {}, {}
+    for _ in range(1000):
+        user_id = rng.randrange(60)
+        points = rng.choice([0, 1, 1, 2, 5, 10])
+        names[user_id] = f"user{user_id}"
+        scores[user_id] = scores.get(user_id, 0) + points
+        assert board.add(user_id, points, names[user_id]) == scores[user_id]
+
+    ordered = sorted(-score for score in scores.values())
+    for user_id, score in scores.items():
+        assert board.rank(user_id) == (bisect.bisect_left(ordered, -score) + 1, score)
+    for n in (1, 5, 10, 100):
+        assert board.top(n) == expected_top(scores, names, n)
+
+
+def test_ties_share_rank():
+    board = Leaderboard()
+    board.load([(1, 'a', 30), (2, 'b', 20), (3, 'c', 20), (4, 'd', 10)])
+    assert [rank for rank, _, _ in board.top(10)] == [1, 2, 2, 4]
+    assert board.rank(3) == (2, 20)
+    assert board.rank(99) is None
+
+
+def test_load_replaces_previous_scores():
+    board = Leaderboard()
+    board.add(1, 50, 'old')
+    board.load([(2, 'new', 5)])
+    assert len(board) == 1
+    assert board.rank(1) is None
+    assert board.top(10) == [[1, 'new', 5]]
@@ -0,0 +1,96 @@
+"""PhaseScheduler'ın sahte bir saatle faz sırası, kaymasız planlama ve çıkarma davranışı."""
+import threading
+
+import pytest
+
+from round_clock import PhaseScheduler
+
+PHASES = [('question', 10), ('reveal', 3), ('intermission', 2)]
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def due(scheduler):
+    item, _ = scheduler._pop_due()
+    if item is None:
+        return None
+    key, round_no, phase, planned = item
+    return key, round_no, phase.name, planned
+
+
+def test_phases_fire_in_order_without_drift():
+    clock = FakeClock()
+    scheduler = PhaseScheduler(clock=clock)
+    scheduler.add('main', PHASES)
+    assert due(scheduler) == ('main', 0, 'question', 0)
+    assert due(scheduler) is None
+    clock.now = 10.4  # Geç uyanma sonraki fazları kaydırmaz
+    assert due(scheduler) == ('main', 0, 'reveal', 10)
+    clock.now = 13
+    assert due(scheduler) == ('main', 0, 'intermission', 13)
+    clock.now = 15
+    assert due(scheduler) == ('main', 1, 'question', 15)
+
+
+def test_rooms_are_interleaved_by_deadline():
+    clock = FakeClock()
+    scheduler = PhaseScheduler(clock=clock)
+    scheduler.add('a', [('question', 4), ('reveal', 4)])
+    scheduler.add('b', [('question', 3), ('reveal', 3)], start=1)
+    clock.now = 8
+    fired = [due(scheduler) for _ in range(5)]
+    assert fired == [('a', 0, 'question', 0), ('b', 0, 'question', 1), ('a', 0, 'reveal', 4),
+                     ('b', 0, 'reveal', 4), ('b', 1, 'question', 7)]
+
+
+def test_removed_and_readded_keys():
+    clock = FakeClock()
+    scheduler = PhaseScheduler(clock=clock)
+    scheduler.add('main', PHASES)
+    scheduler.remove('main')
+    assert 'main' not in scheduler
+    assert due(scheduler) is None
+    scheduler.add('main', PHASES, start=5, first_phase=1)
+    clock.now = 20
+    assert due(scheduler) == ('main', 0, 'reveal', 15)
+
+
+def test_realigns_when_more_than_a_round_behind():
+    clock = FakeClock()
+    scheduler = PhaseScheduler(clock=clock)
+    scheduler.add('main', [('question', 1), ('reveal', 1)])
+    assert due(scheduler) == ('main', 0, 'question', 0)
+    clock.now = 10  # Dört tur geride: atlanan turlar tek tek tetiklenmez
+    assert due(scheduler) == ('main', 0, 'reveal', 1)
+    assert due(scheduler) == ('main', 1, 'question', 10)
+    assert due(scheduler) is None
+
+
+def test_add_rejects_empty_cycle():
+    with pytest.raises(ValueError):
+        PhaseScheduler().add('main', [('question', 0)])
+
+
+def test_run_reports_ticks_until_stopped():
+    clock = FakeClock()
+    scheduler = PhaseScheduler(clock=clock, max_idle_wait=0.01)
+    scheduler.add('main', PHASES)
+    ticks = []
+
+    def callback(tick):
+        ticks.append(tick)
+        clock.now = tick.deadline
+        if len(ticks) == 4:
+            scheduler.stop()
+
+    scheduler.run(threading.Event(), callback)
+    assert [(tick.round_no, tick.phase, tick.start, tick.deadline) for tick in ticks] == [
+        (0, 'question', 0, 10), (0, 'reveal', 10, 13), (0, 'intermission', 13, 15), (1, 'question', 15, 25)]
+    assert all(tick.jitter == 0 for tick in ticks)
+    assert scheduler.jitter.summary()['count'] == 4
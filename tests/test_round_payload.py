@@ -0,0 +1,39 @@
+"""Tur paketinin JSON ve kompakt ikili kodlamaları."""
+import json
+
+import pytest
+
+from round_payload import COMPACT_MAGIC, build_snapshot, decode_compact, encode_compact
+
+QUESTION = {'id': 42, 'question_text': 'Hangi içecek Türk kahvesi fincanında gelir?',
+            'options': ['Çay', 'Türk kahvesi', 'Salep ☕']}
+
+
+def test_compact_round_trip():
+    payload = dict(QUESTION, round_id='main:17', end_time='2026-10-18T12:00:30+00:00', duration_ms=30000)
+    data = encode_compact(payload)
+    assert data[:2] == COMPACT_MAGIC
+    assert decode_compact(data) == payload
+
+
+def test_decode_rejects_other_formats():
+    with pytest.raises(ValueError):
+        decode_compact(b'{"id": 1}')
+
+
+def test_both_encodings_carry_the_same_round():
+    json_snapshot = build_snapshot(QUESTION, 'main:17', '2026-10-18T12:00:30+00:00', 12.5)
+    compact_snapshot = build_snapshot(QUESTION, 'main:17', '2026-10-18T12:00:30+00:00', 12.5, encoding='compact')
+    decoded = json.loads(json_snapshot.data.decode('utf-8'))
+    assert decoded == decode_compact(compact_snapshot.data)
+    assert decoded['duration_ms'] == 12500
+    assert len(compact_snapshot.data) < len(json_snapshot.data)
+    with pytest.raises(ValueError):
+        build_snapshot(QUESTION, 'main:17', '', 1, encoding='xml')
+
+
+def test_remaining_ms_counts_down_to_zero():
+    snapshot = build_snapshot(QUESTION, 'main:17', '', 10)
+    assert snapshot.question_id == 42
+    assert snapshot.remaining_ms(snapshot.deadline - 2.5) == 2500
+    assert snapshot.remaining_ms(snapshot.deadline + 1) == 0
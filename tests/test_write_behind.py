@@ -0,0 +1,85 @@
+"""WriteBehindBuffer'ın bozuk satırı ayıklama ve geçici hatada yeniden deneme davranışı."""
+from write_behind import WriteBehindBuffer
+
+
+class FakeStore:
+    """Partiyi ya tamamen yazar ya da hiç yazmaz (tek bir INSERT gibi)."""
+
+    def __init__(self, bad=(), transient_failures=0):
+        self.bad = set(bad)
+        self.transient_failures = transient_failures
+        self.rows = []
+        self.calls = 0
+
+    def write(self, rows):
+        self.calls += 1
+        if self.transient_failures:
+            self.transient_failures -= 1
+            raise ConnectionError("database is unreachable")
+        if any(row['id'] in self.bad for row in rows):
+            raise ValueError("row violates a constraint")
+        self.rows.extend(rows)
+
+
+def make_buffer(store, **kwargs):
+    return WriteBehindBuffer(store.write, retryable=lambda e: isinstance(e, ConnectionError), **kwargs)
+
+
+def rows(n):
+    return [{'id': i} for i in range(n)]
+
+
+def test_bad_rows_are_isolated_and_dropped():
+    store = FakeStore(bad={3, 7})
+    buffer = make_buffer(store)
+    written, retry = buffer._write(rows(10))
+    assert (written, retry) == (8, [])
+    assert [row['id'] for row in store.rows] == [0, 1, 2, 4, 5, 6, 8, 9]
+
+
+def test_single_bad_row_costs_logarithmic_writes():
+    store = FakeStore(bad={100})
+    buffer = make_buffer(store)
+    assert buffer._write(rows(256)) == (255, [])
+    # 1 başarısız tam parti + her seviyede iki yarı (8 seviye)
+    assert store.calls <= 1 + 2 * 8
+
+
+def test_transient_error_requeues_rows_in_order():
+    store = FakeStore(transient_failures=1)
+    buffer = make_buffer(store)
+    for row in rows(5):
+        buffer.add(row)
+    assert buffer.flush() == 0
+    assert buffer.pending() == 5
+    assert buffer.flush() == 5
+    assert [row['id'] for row in store.rows] == [0, 1, 2, 3, 4]
+
+
+def test_transient_error_while_bisecting_requeues_the_rest():
+    def write(batch):
+        if len(batch) == 4:
+            raise ValueError("row violates a constraint")
+        raise ConnectionError("connection lost")  # Bölme sırasında bağlantı kopar
+
+    buffer = WriteBehindBuffer(write, retryable=lambda e: isinstance(e, ConnectionError))
+    written, retry = buffer._write(rows(4))
+    assert written == 0
+    assert [row['id'] for row in retry] == [0, 1, 2, 3]
+
+
+def test_every_error_is_transient_without_classifier():
+    store = FakeStore(bad={0})
+    buffer = WriteBehindBuffer(store.write)
+    assert buffer._write(rows(3)) == (0, rows(3))
+
+
+def test_pending_limit_drops_oldest_rows():
+    store = FakeStore(transient_failures=1)
+    buffer = make_buffer(store, max_pending=3)
+    for row in rows(5):
+        buffer.add(row)
+    assert buffer.flush() == 0
+    assert buffer.pending() == 3
+    buffer.flush()
+    assert [row['id'] for row in store.rows] == [2, 3, 4]
@@ -0,0 +1,115 @@
+"""Write-behind tamponu: kayıtları bellekte toplayıp toplu halde yazar.
+
+Cevaplar tur sonunda birkaç saniye içinde yığıldığı için her cevap için ayrı
+INSERT yapmak yerine satırlar burada biriktirilir ve kısa aralıklarla (veya
+tur kapanınca) tek bir toplu yazma ile veritabanına aktarılır.
+"""
+import logging
+import threading
+
+
+class WriteBehindBuffer:
+    """Satırları toplar, `flush_fn(rows)` ile toplu olarak yazar.
+
+    `flush_fn` bir satır (dict) listesi alır. `retryable(exc)` True dönen
+    (geçici) hatalarda satırlar `max_pending` sınırına kadar bir sonraki
+    denemeye geri konur. Diğer hatalarda parti ikiye bölünerek yeniden
+    yazılır; tek başına da yazılamayan satırlar loglanıp atılır, böylece bozuk
+    bir satır sonraki tüm flush'ları engellemez. `retryable` verilmezse her
+    hata geçici sayılır.
+    """
+
+    def __init__(self, flush_fn, interval=1.0, max_batch=500, max_pending=50000, name='write-behind',
+                 retryable=None):
+        self._flush_fn = flush_fn
+        self._retryable = retryable
+        self.interval = interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.name = name
+        self._rows = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Aynı anda tek flush
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, row):
+        """Bir satırı tampona ekler; tampon dolarsa yazıcıyı erken uyandırır."""
+        with self._lock:
+            self._rows.append(row)
+            pending = len(self._rows)
+        if pending >= self.max_batch:
+            self._wake.set()
+
+    def request_flush(self):
+        """Yazıcı thread'ini beklemeden flush yapmaya zorlar (ör. tur kapandığında)."""
+        self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self):
+        """Tampondaki tüm satırları yazar ve yazılan satır sayısını döndürür."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            written, retry = self._write(rows)
+            if retry:
+                logging.warning(f"{self.name}: Failed to flush {len(retry)} rows, will retry.")
+                with self._lock:
+                    # Yazılamayanları başa geri koy (sıra korunur), sınırı aşanları at
+                    self._rows[:0] = retry
+                    overflow = len(self._rows) - self.max_pending
+                    if overflow > 0:
+                        del self._rows[:overflow]
+                        logging.error(f"{self.name}: Dropped {overflow} rows, pending limit reached.")
+            logging.debug(f"{self.name}: Flushed {written} rows.")
+            return written
+
+    def _write(self, rows):
+        """(yazılan satır sayısı, yeniden denenecek satırlar) döndürür.
+
+        Kalıcı hatada parti ikiye bölünür (bozuk satır başına log2(n) ek yazma).
+        """
+        try:
+            self._flush_fn(rows)
+            return len(rows), []
+        except Exception as e:
+            if self._retryable is None or self._retryable(e):
+                logging.exception(f"{self.name}: Transient error while writing {len(rows)} rows.")
+                return 0, rows
+            if len(rows) == 1:
+                logging.error(f"{self.name}: Dropped row that cannot be written: {rows[0]!r} ({e})")
+                return 0, []
+        middle = len(rows) // 2
+        written, retry = self._write(rows[:middle])
+        if retry:
+            # Bağlantı koptuysa geri kalanı da denemeden sıraya geri koy
+            return written, retry + rows[middle:]
+        more_written, retry = self._write(rows[middle:])
+        return written + more_written, retry
+
+    def _run(self, stop_event):
+        logging.info(f"{self.name}: Writer thread started.")
+        while not stop_event.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+        # Durdurulurken kalanları son kez yaz
+        self.flush()
+        logging.info(f"{self.name}: Writer thread stopped.")
+
+    def start(self, stop_event):
+        """Arka plan yazıcısını başlatır; `stop_event` set edilince son bir flush yapar."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, args=(stop_event,), daemon=True, name=self.name)
+            self._thread.start()
+
+    def join(self, timeout=None):
+        """Durdurma sonrası son flush'ın bitmesini bekler."""
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,27 @@
+"""Uygulama fabrikası giriş noktası (gunicorn ve diğer WSGI sunucuları).
+
+    gunicorn -c gunicorn.conf.py 'wsgi:create_app()'
+
+gunicorn.conf.py uygulamayı varsayılan olarak master süreçte bir kez yükler
+(preload_app): ağır importlar (Flask, SQLAlchemy, Socket.IO) ve şema kontrolü
+worker başına değil dağıtım başına bir kez yapılır; worker'lar hazır
+modülleri fork ile devralır. Bu modülü içe aktarmak app.py'yi yüklemez.
+"""
+import logging
+
+
+def create_app():
+    """app.py'yi yükler, şemayı gerekiyorsa kontrol eder ve Flask uygulamasını döndürür.
+
+    Worker'a özel işler (broker, zamanlayıcı, önbellek ısıtma) fork'tan sonra
+    gunicorn'un post_worker_init kancasında start_quiz_timer() ile başlar.
+    """
+    import app as quiz
+
+    with quiz.app.app_context():
+        try:
+            quiz.ensure_schema_once()
+        except Exception as e:
+            # Veritabanı geçici olarak erişilemiyorsa sunucu yine açılsın; hatalar isteklerde görünür
+            logging.error(f"Error during initial DB check/creation: {e}")
+    return quiz.app